@@ -1,666 +1,216 @@
-from flask import Flask, render_template, request, jsonify, send_file
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
-import io
+from flask import Flask, g, render_template, request, jsonify, send_file, stream_with_context
 import base64
-from datetime import datetime, timedelta
 import os
-import csv
 from werkzeug.utils import secure_filename
-import math
 import logging
+import threading
+import time
+import uuid
+
+from batch import MAX_BATCH_TIMELINES, archive_names, stream_batch_zip
+from csv_ingest import error_summary, group_csv_timelines, open_text_stream, stream_events_json, validate_csv
+from encoders import OUTPUT_FORMATS, normalize_encode_options, resolve_format
+from events import EventTable
+from fonts import font_registry
+from jobs import JobQueue, JobQueueFull
+from layout import normalize_render_options, preload_fonts
+from lru import LRUCache
+from metrics import (observe_stages, output_bytes, pop_timer, push_timer, render_events, render_metrics,
+                     render_stages, request_seconds, requests_total, server_timing, stage, stats_lines)
+from raster import create_timeline_image  # Re-exported for scripts that import it from app
+from render_cache import RenderCache, is_render_key, render_key
+from render_pool import RenderPool, RenderPoolError, RenderPoolFull, RenderTimeout
+from renderer import render_timeline
+from sessions import TimelineSession
+from sprites import marker_sprites
+from text_cache import glyph_runs, text_metrics
+from tiles import TILE_SIZE, TileSet
 
 app = Flask(__name__)
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['RENDER_CACHE_BYTES'] = int(os.environ.get('TIMELINE_RENDER_CACHE_BYTES', 64 * 1024 * 1024))
+app.config['RENDER_CACHE_DIR'] = os.environ.get('TIMELINE_RENDER_CACHE_DIR')  # Unset disables the disk tier
+app.config['RENDER_WORKERS'] = int(os.environ.get('TIMELINE_RENDER_WORKERS', os.cpu_count() or 1))  # 0 renders in-thread
+app.config['RENDER_QUEUE_SIZE'] = int(os.environ.get('TIMELINE_RENDER_QUEUE_SIZE', 2 * app.config['RENDER_WORKERS']))
+app.config['RENDER_TIMEOUT'] = float(os.environ.get('TIMELINE_RENDER_TIMEOUT', 30))  # Seconds per render
+app.config['RENDER_START_METHOD'] = os.environ.get('TIMELINE_RENDER_START_METHOD', 'spawn')  # gunicorn.conf.py: forkserver
+app.config['RENDER_MAX_RENDERS'] = int(os.environ.get('TIMELINE_RENDER_MAX_RENDERS', 0))  # Per worker; 0 never recycles
+app.config['JOB_QUEUE_SIZE'] = int(os.environ.get('TIMELINE_JOB_QUEUE_SIZE', 100))
+app.config['JOB_TTL'] = float(os.environ.get('TIMELINE_JOB_TTL', 600))  # Seconds a finished job's result is kept
+app.config['JOB_RESULT_BYTES'] = int(os.environ.get('TIMELINE_JOB_RESULT_BYTES', 128 * 1024 * 1024))
+# Server-Timing on every response; otherwise only when a request asks with ?timing=1
+app.config['SERVER_TIMING'] = os.environ.get('TIMELINE_SERVER_TIMING', '').lower() in ('1', 'true')
 
 # Set up logging for font debugging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def hex_to_rgb(hex_color):
-    """Convert hex color to RGB tuple."""
-    hex_color = hex_color.lstrip('#')
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+render_cache = RenderCache(max_bytes=app.config['RENDER_CACHE_BYTES'], cache_dir=app.config['RENDER_CACHE_DIR'])
 
-def draw_ultra_smooth_curve(draw, start_point, end_point, color, width=2, curve_factor=0.5):
-    """Draw an ultra-smooth curved line using high-resolution Bezier curves."""
-    x1, y1 = float(start_point[0]), float(start_point[1])
-    x2, y2 = float(end_point[0]), float(end_point[1])
-    
-    # Convert color to RGB tuple if it's a string
-    if isinstance(color, str):
-        if color.lower() == 'gray' or color.lower() == 'grey':
-            color = (128, 128, 128)
-        elif color.lower() == 'black':
-            color = (0, 0, 0)
-        elif color.lower() == 'white':
-            color = (255, 255, 255)
-        elif color.startswith('#'):
-            color = hex_to_rgb(color)
-        else:
-            color = (128, 128, 128)  # Default to gray
-    
-    # Calculate distance and direction
-    dx = x2 - x1
-    dy = y2 - y1
-    distance = math.sqrt(dx*dx + dy*dy)
-    
-    # Adaptive curve control based on distance and direction
-    if abs(dx) > abs(dy):  # More horizontal
-        control_distance = min(abs(dx) * curve_factor, distance * 0.4)
-        cx1 = x1 + (control_distance if dx > 0 else -control_distance)
-        cy1 = y1 + dy * 0.1
-        cx2 = x2 - (control_distance if dx > 0 else -control_distance)
-        cy2 = y2 + dy * 0.1
-    else:  # More vertical
-        control_distance = min(abs(dy) * curve_factor, distance * 0.4)
-        cx1 = x1 + dx * 0.1
-        cy1 = y1 + (control_distance if dy > 0 else -control_distance)
-        cx2 = x2 + dx * 0.1
-        cy2 = y2 - (control_distance if dy > 0 else -control_distance)
-    
-    # Generate smooth curve with many points for ultra-smooth appearance
-    segments = max(50, int(distance / 3))  # Adaptive segment count
-    points = []
-    
-    for i in range(segments + 1):
-        t = i / segments
-        # Smooth cubic Bezier curve
-        mt = 1 - t
-        x = (mt**3 * x1 + 
-             3 * mt**2 * t * cx1 + 
-             3 * mt * t**2 * cx2 + 
-             t**3 * x2)
-        y = (mt**3 * y1 + 
-             3 * mt**2 * t * cy1 + 
-             3 * mt * t**2 * cy2 + 
-             t**3 * y2)
-        points.append((int(x), int(y)))
-    
-    # Draw the ultra-smooth curve
-    for i in range(len(points) - 1):
-        draw.line([points[i], points[i + 1]], fill=color, width=int(width))
-    
-    # Add anti-aliasing effect by drawing slightly thinner lines around the main line
-    if width > 2:
-        try:
-            lighter_color = tuple(min(255, int(c + (255-c)*0.3)) for c in color)
-            for i in range(len(points) - 1):
-                draw.line([points[i], points[i + 1]], fill=lighter_color, width=max(1, int(width)-1))
-        except (TypeError, ValueError):
-            # Skip anti-aliasing if color processing fails
-            pass
-
-def draw_flowing_branch(draw, start_x, timeline_y, branch_y, end_x, color, width=4):
-    """Draw a beautifully flowing branching line for duration events."""
-    # Convert to float for calculations
-    start_x = float(start_x)
-    timeline_y = float(timeline_y)
-    branch_y = float(branch_y)
-    end_x = float(end_x)
-    width = int(width)
-    
-    # Calculate curve parameters for natural flow
-    branch_distance = abs(branch_y - timeline_y)
-    horizontal_distance = abs(end_x - start_x)
-    
-    # Create graceful S-curve for the branch
-    if horizontal_distance > 20:
-        # Multi-point flowing curve
-        quarter_x = start_x + (end_x - start_x) * 0.25
-        three_quarter_x = start_x + (end_x - start_x) * 0.75
-        mid_x = (start_x + end_x) / 2
-        
-        # Calculate flowing intermediate points
-        curve_offset = branch_distance * 0.3
-        mid_y1 = timeline_y + (branch_y - timeline_y) * 0.7
-        mid_y2 = branch_y + (curve_offset if branch_y > timeline_y else -curve_offset)
-        mid_y3 = timeline_y + (branch_y - timeline_y) * 0.7
-        
-        # Draw flowing segments
-        draw_ultra_smooth_curve(draw, (start_x, timeline_y), (quarter_x, mid_y1), color, width, 0.8)
-        draw_ultra_smooth_curve(draw, (quarter_x, mid_y1), (mid_x, mid_y2), color, width, 0.6)
-        draw_ultra_smooth_curve(draw, (mid_x, mid_y2), (three_quarter_x, mid_y3), color, width, 0.6)
-        draw_ultra_smooth_curve(draw, (three_quarter_x, mid_y3), (end_x, timeline_y), color, width, 0.8)
-    else:
-        # Simple flowing curve for short distances
-        mid_x = (start_x + end_x) / 2
-        peak_y = branch_y + (branch_distance * 0.3 if branch_y > timeline_y else -branch_distance * 0.3)
-        
-        draw_ultra_smooth_curve(draw, (start_x, timeline_y), (mid_x, peak_y), color, width, 0.7)
-        draw_ultra_smooth_curve(draw, (mid_x, peak_y), (end_x, timeline_y), color, width, 0.7)
-
-def get_optimal_date_position(x_pos, timeline_y, existing_positions, text_width, is_duration=False):
-    """Calculate optimal position for date text to avoid overlaps."""
-    x_pos = float(x_pos)
-    timeline_y = float(timeline_y)
-    text_width = float(text_width)
-    
-    base_y = timeline_y + 25  # Default position below timeline
-    alternative_y = timeline_y - 45  # Alternative position above timeline
-    
-    # Check for overlaps with existing positions
-    margin = 15
-    
-    def check_overlap(x, y, width):
-        for existing_x, existing_y, existing_width in existing_positions:
-            existing_x = float(existing_x)
-            existing_y = float(existing_y)
-            existing_width = float(existing_width)
-            if (abs(x - existing_x) < (width + existing_width) / 2 + margin and
-                abs(y - existing_y) < 25):
-                return True
-        return False
-    
-    # Try default position first
-    if not check_overlap(x_pos, base_y, text_width):
-        return base_y, False
-    
-    # Try alternative position above timeline
-    if not check_overlap(x_pos, alternative_y, text_width):
-        return alternative_y, True
-    
-    # If both positions conflict, find an available offset
-    for offset in range(25, 120, 25):
-        # Try below with offset
-        test_y = base_y + offset
-        if not check_overlap(x_pos, test_y, text_width):
-            return test_y, False
-        
-        # Try above with offset
-        test_y = alternative_y - offset
-        if not check_overlap(x_pos, test_y, text_width):
-            return test_y, True
-    
-    # Fallback: use default position
-    return base_y, False
+# Worker processes are started on the first render (or by warm_up() below), not at import.
+# A forkserver imports the worker entry module and warmup once, then forks every worker
+# from that warm process
+render_pool = RenderPool(workers=app.config['RENDER_WORKERS'], max_queue=app.config['RENDER_QUEUE_SIZE'],
+                         timeout=app.config['RENDER_TIMEOUT'], start_method=app.config['RENDER_START_METHOD'],
+                         max_renders=app.config['RENDER_MAX_RENDERS'] or None,
+                         preload=['render_pool', 'warmup']) if app.config['RENDER_WORKERS'] > 0 else None
 
-def format_date_readable(date_obj):
-    """Format date as DD Month YYYY for better readability."""
-    return date_obj.strftime('%d %B %Y')
+# Set once warm_up() has finished; /ready answers 503 until then
+ready = threading.Event()
+_warm_up_lock = threading.Lock()
+_warm_up_thread = None
 
-def get_text_dimensions(draw, text, font):
-    """Safely get text dimensions with fallbacks for different font types."""
-    text = str(text)  # Ensure string
-    try:
-        # Try the modern textbbox method first
-        bbox = draw.textbbox((0, 0), text, font=font)
-        width = float(bbox[2] - bbox[0])
-        height = float(bbox[3] - bbox[1])
-        return width, height
-    except (AttributeError, TypeError):
-        try:
-            # Fallback to older textsize method
-            width, height = draw.textsize(text, font=font)
-            return float(width), float(height)
-        except (AttributeError, TypeError):
-            # Last resort: estimate based on character count and scale factor
-            if hasattr(font, 'size'):
-                char_width = font.size * 0.6
-                char_height = font.size * 1.2
-            else:
-                # Very basic fallback
-                char_width = 12
-                char_height = 16
-            return float(len(text) * char_width), float(char_height)
+def _render_error_status(e):
+    """HTTP status for a failed render."""
+    if isinstance(e, RenderPoolFull):
+        return 429
+    if isinstance(e, RenderTimeout):
+        return 504
+    if isinstance(e, RenderPoolError):
+        return 503
+    return 500
 
-def get_font(size):
-    """Get a font with the specified size, trying multiple fallback options."""
-    
-    logger.info(f"Attempting to load font with size: {size}")
-    
-    # First try local bundled fonts
-    try:
-        import os
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        local_font_paths = [
-            os.path.join(script_dir, 'fonts', 'DejaVuSans.ttf'),
-            os.path.join(script_dir, 'fonts', 'LiberationSans-Regular.ttf'),
-            os.path.join(script_dir, 'fonts', 'OpenSans-Regular.ttf'),
-            os.path.join(script_dir, 'fonts', 'arial.ttf'),
-        ]
-        
-        for font_path in local_font_paths:
-            if os.path.exists(font_path):
-                try:
-                    logger.info(f"Successfully loaded local font: {font_path}")
-                    return ImageFont.truetype(font_path, size)
-                except (OSError, IOError) as e:
-                    logger.warning(f"Failed to load local font {font_path}: {e}")
-                    continue
-    except Exception as e:
-        logger.warning(f"Error checking local fonts: {e}")
-    
-    # Then try system fonts
-    font_paths = [
-        # Windows fonts
-        "arial.ttf",
-        "C:/Windows/Fonts/arial.ttf",
-        "C:/Windows/Fonts/calibri.ttf",
-        # Linux/Unix fonts
-        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
-        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
-        "/usr/share/fonts/TTF/DejaVuSans.ttf",
-        "/System/Library/Fonts/Arial.ttf",  # macOS
-        "/usr/share/fonts/truetype/opensans/OpenSans-Regular.ttf",
-        "/usr/share/fonts/google-noto/NotoSans-Regular.ttf",
-        "/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf",
-        "/usr/share/fonts/truetype/ubuntu-font-family/Ubuntu-R.ttf",
-        # Generic fallbacks
-        "DejaVuSans.ttf",
-        "LiberationSans-Regular.ttf",
-        "OpenSans-Regular.ttf",
-        "Ubuntu-R.ttf"
-    ]
-    
-    for font_path in font_paths:
-        try:
-            font = ImageFont.truetype(font_path, size)
-            logger.info(f"Successfully loaded system font: {font_path}")
-            return font
-        except (OSError, IOError):
-            continue
-    
-    logger.warning("No TrueType fonts found, falling back to default font")
-    
-    # Try to create a basic font directory and font if none exist
-    try:
-        import os
-        font_dir = os.path.join(os.path.dirname(__file__), 'fonts')
-        if not os.path.exists(font_dir):
-            os.makedirs(font_dir, exist_ok=True)
-            logger.info(f"Created fonts directory: {font_dir}")
-    except Exception as e:
-        logger.warning(f"Could not create fonts directory: {e}")
-    
-    # Enhanced default font that works better with scaling
-    try:
-        # Create a better default font for server environments
-        default_font = ImageFont.load_default()
-        logger.info("Using PIL default font")
-        
-        # Try to create a synthetic font that scales better
-        # This is a workaround for servers without proper font support
-        class ScaledDefaultFont:
-            def __init__(self, base_font, target_size):
-                self.base_font = base_font
-                self.size = target_size
-                
-        return ScaledDefaultFont(default_font, size)
-    except Exception as e:
-        logger.error(f"Error with default font: {e}")
-        try:
-            return ImageFont.load_default()
-        except Exception as e2:
-            logger.error(f"Critical font error: {e2}")
-            # Last resort - return None and handle in calling code
-            return None
-
-def create_timeline_image(events):
-    """Generate a high-quality timeline image from a list of events."""
-    if not events:
-        return None
-    
-    # High-resolution dimensions for crisp quality
-    scale_factor = 2  # For high DPI rendering
-    width = 2000 * scale_factor
-    height = 1000 * scale_factor
-    margin = 150 * scale_factor
-    timeline_y = height // 2
-    
-    # Create high-resolution image with anti-aliasing
-    img = Image.new('RGB', (width, height), 'white')
-    draw = ImageDraw.Draw(img)
-    
-    # Load high-quality fonts with appropriate scaling
-    try:
-        font_large = get_font(24 * scale_factor)
-        font_medium = get_font(20 * scale_factor)
-        font_small = get_font(16 * scale_factor)
-        font_title = get_font(28 * scale_factor)
-        
-        # Ensure we have valid fonts, fallback to default if any are None
-        if any(font is None for font in [font_large, font_medium, font_small, font_title]):
-            default_font = ImageFont.load_default()
-            font_large = font_large or default_font
-            font_medium = font_medium or default_font
-            font_small = font_small or default_font
-            font_title = font_title or default_font
-    except Exception as e:
-        # Complete fallback to default fonts
-        print(f"Font loading error: {e}")
-        default_font = ImageFont.load_default()
-        font_large = default_font
-        font_medium = default_font
-        font_small = default_font
-        font_title = default_font
-    
-    # Parse and sort events by start date
-    parsed_events = []
-    for event in events:
-        start_date = datetime.strptime(event['date'], '%Y-%m-%d')
-        end_date = None
-        if event.get('end_date'):
-            end_date = datetime.strptime(event['end_date'], '%Y-%m-%d')
-        
-        parsed_events.append({
-            'start_date': start_date,
-            'end_date': end_date,
-            'event': event['event'],
-            'color': event.get('color', '#dc3545'),
-            'original': event
-        })
-    
-    parsed_events.sort(key=lambda x: x['start_date'])
-    
-    # Draw main timeline with elegant styling
-    timeline_start = margin
-    timeline_end = width - margin
-    timeline_width = 6 * scale_factor
-    
-    # Draw main timeline with gradient effect
-    for i in range(int(timeline_width)):
-        alpha = 0.8 - (i * 0.1)
-        gray_value = int(50 + i * 10)
-        color = (gray_value, gray_value, gray_value)
-        draw.line([(timeline_start, timeline_y - i), (timeline_end, timeline_y - i)], fill=color, width=1)
-    
-    # Add elegant rounded caps to timeline
-    cap_radius = int(4 * scale_factor)
-    draw.ellipse([timeline_start - cap_radius, timeline_y - cap_radius,
-                  timeline_start + cap_radius, timeline_y + cap_radius], fill='black')
-    draw.ellipse([timeline_end - cap_radius, timeline_y - cap_radius,
-                  timeline_end + cap_radius, timeline_y + cap_radius], fill='black')
-    
-    # Calculate time range for positioning
-    all_dates = [e['start_date'] for e in parsed_events]
-    for e in parsed_events:
-        if e['end_date']:
-            all_dates.append(e['end_date'])
-    
-    if len(all_dates) == 1:
-        date_range = timedelta(days=1)
-        min_date = all_dates[0]
-    else:
-        min_date = min(all_dates)
-        max_date = max(all_dates)
-        date_range = max_date - min_date
-        if date_range.days == 0:
-            date_range = timedelta(days=1)
-    
-    def date_to_x_position(date):
-        if date_range.days == 0:
-            return float(width // 2)
-        progress = (date - min_date).total_seconds() / date_range.total_seconds()
-        return float(timeline_start + progress * (timeline_end - timeline_start))
-    
-    # Track positions to avoid overlaps
-    used_positions = []
-    date_positions = []
-    
-    # Draw events with enhanced quality
-    for i, event in enumerate(parsed_events):
-        color = hex_to_rgb(event['color'])
-        start_x = date_to_x_position(event['start_date'])
-        
-        if event['end_date']:
-            # Duration event with flowing curves
-            end_x = date_to_x_position(event['end_date'])
-            
-            # Find available y position
-            branch_height = 80 * scale_factor
-            y_offset = 0
-            while any(abs(pos - y_offset) < 60 * scale_factor for pos in used_positions):
-                y_offset += 60 * scale_factor if i % 2 == 0 else -60 * scale_factor
-            
-            used_positions.append(y_offset)
-            
-            # Determine if above or below timeline
-            is_above = (i % 2 == 0) or y_offset < 0
-            direction = -1 if is_above else 1
-            
-            branch_y = timeline_y + direction * (branch_height + abs(y_offset))
-            
-            # Draw the beautiful flowing branch
-            draw_flowing_branch(draw, start_x, timeline_y, branch_y, end_x, color, 6 * scale_factor)
-            
-            # Draw elegant start and end markers with soft glow
-            circle_radius = int(8 * scale_factor)
-            glow_radius = int(12 * scale_factor)
-            
-            # Soft glow effect
-            for r in range(glow_radius, circle_radius, -1):
-                alpha = max(0, 60 - (glow_radius - r) * 8)
-                glow_color = tuple(min(255, int(c + alpha)) for c in color)
-                draw.ellipse([
-                    int(start_x - r), int(timeline_y - r),
-                    int(start_x + r), int(timeline_y + r)
-                ], fill=glow_color)
-                draw.ellipse([
-                    int(end_x - r), int(timeline_y - r),
-                    int(end_x + r), int(timeline_y + r)
-                ], fill=glow_color)
-            
-            # Main circles with elegant borders
-            border_width = int(3 * scale_factor)
-            inner_border_width = int(1 * scale_factor)
-            
-            draw.ellipse([
-                int(start_x - circle_radius), int(timeline_y - circle_radius),
-                int(start_x + circle_radius), int(timeline_y + circle_radius)
-            ], fill=color, outline='white', width=border_width)
-            draw.ellipse([
-                int(start_x - circle_radius + 2), int(timeline_y - circle_radius + 2),
-                int(start_x + circle_radius - 2), int(timeline_y + circle_radius - 2)
-            ], outline='black', width=inner_border_width)
-            
-            draw.ellipse([
-                int(end_x - circle_radius), int(timeline_y - circle_radius),
-                int(end_x + circle_radius), int(timeline_y + circle_radius)
-            ], fill=color, outline='white', width=border_width)
-            draw.ellipse([
-                int(end_x - circle_radius + 2), int(timeline_y - circle_radius + 2),
-                int(end_x + circle_radius - 2), int(timeline_y + circle_radius - 2)
-            ], outline='black', width=inner_border_width)
-            
-            # Event text with elegant styling
-            event_text = str(event['event'])  # Ensure string type
-            try:
-                text_bbox = get_text_dimensions(draw, event_text, font_medium)
-                text_width = text_bbox[0]
-            except:
-                text_width = float(len(event_text) * 12 * scale_factor)  # Fallback calculation
-            
-            text_x = float(start_x + end_x) / 2.0 - text_width / 2.0
-            
-            if is_above:
-                text_y = float(branch_y - 35 * scale_factor)
-            else:
-                text_y = float(branch_y + 15 * scale_factor)
-            
-            # Elegant text background with soft shadow
-            padding = int(8 * scale_factor)
-            shadow_offset = int(3 * scale_factor)
-            
-            # Drop shadow
-            draw.rectangle([
-                int(text_x - padding + shadow_offset), int(text_y - 3 * scale_factor + shadow_offset),
-                int(text_x + text_width + padding + shadow_offset), int(text_y + 25 * scale_factor + shadow_offset)
-            ], fill=(200, 200, 200))
-            
-            # Main background
-            draw.rectangle([
-                int(text_x - padding), int(text_y - 3 * scale_factor),
-                int(text_x + text_width + padding), int(text_y + 25 * scale_factor)
-            ], fill='white', outline=color, width=int(2 * scale_factor))
-            
-            draw.text((int(text_x), int(text_y)), event_text, fill=color, font=font_medium)
-            
-            # Smart date positioning with new format
-            start_date_text = format_date_readable(event['start_date'])
-            end_date_text = format_date_readable(event['end_date'])
-            
-            try:
-                start_bbox = get_text_dimensions(draw, start_date_text, font_small)
-                start_width = float(start_bbox[0])
-                end_bbox = get_text_dimensions(draw, end_date_text, font_small)
-                end_width = float(end_bbox[0])
-            except:
-                start_width = float(len(start_date_text) * 10 * scale_factor)
-                end_width = float(len(end_date_text) * 10 * scale_factor)
-            
-            # Calculate optimal positions
-            start_date_y, start_above = get_optimal_date_position(
-                start_x, timeline_y, date_positions, start_width, True)
-            date_positions.append((float(start_x), float(start_date_y), float(start_width)))
-            
-            end_date_y, end_above = get_optimal_date_position(
-                end_x, timeline_y, date_positions, end_width, True)
-            date_positions.append((float(end_x), float(end_date_y), float(end_width)))
-            
-            # Draw elegant date labels
-            date_padding = int(6 * scale_factor)
-            
-            # Start date
-            draw.rectangle([
-                int(start_x - start_width / 2.0 - date_padding), int(start_date_y - 3 * scale_factor),
-                int(start_x + start_width / 2.0 + date_padding), int(start_date_y + 18 * scale_factor)
-            ], fill='white', outline='gray', width=int(1 * scale_factor))
-            draw.text((int(start_x - start_width / 2.0), int(start_date_y)), start_date_text, fill='black', font=font_small)
-            
-            # End date
-            draw.rectangle([
-                int(end_x - end_width / 2.0 - date_padding), int(end_date_y - 3 * scale_factor),
-                int(end_x + end_width / 2.0 + date_padding), int(end_date_y + 18 * scale_factor)
-            ], fill='white', outline='gray', width=int(1 * scale_factor))
-            draw.text((int(end_x - end_width / 2.0), int(end_date_y)), end_date_text, fill='black', font=font_small)
-            
-        else:
-            # Point event with flowing lines
-            line_height = 70 * scale_factor
-            top_point = (start_x, timeline_y - line_height)
-            bottom_point = (start_x, timeline_y + line_height)
-            
-            # Draw elegant flowing vertical lines
-            draw_ultra_smooth_curve(draw, top_point, (start_x, timeline_y), color, 4 * scale_factor, 0.3)
-            draw_ultra_smooth_curve(draw, (start_x, timeline_y), bottom_point, color, 4 * scale_factor, 0.3)
-            
-            # Draw elegant circle with soft glow
-            circle_radius = int(10 * scale_factor)
-            glow_radius = int(15 * scale_factor)
-            
-            # Soft glow effect
-            for r in range(glow_radius, circle_radius, -1):
-                alpha = max(0, 40 - (glow_radius - r) * 5)
-                glow_color = tuple(min(255, int(c + alpha)) for c in color)
-                draw.ellipse([
-                    int(start_x - r), int(timeline_y - r),
-                    int(start_x + r), int(timeline_y + r)
-                ], fill=glow_color)
-            
-            # Main circle with elegant border
-            border_width = int(4 * scale_factor)
-            inner_border_width = int(1 * scale_factor)
-            
-            draw.ellipse([
-                int(start_x - circle_radius), int(timeline_y - circle_radius),
-                int(start_x + circle_radius), int(timeline_y + circle_radius)
-            ], fill=color, outline='white', width=border_width)
-            draw.ellipse([
-                int(start_x - circle_radius + 3), int(timeline_y - circle_radius + 3),
-                int(start_x + circle_radius - 3), int(timeline_y + circle_radius - 3)
-            ], outline='black', width=inner_border_width)
-            
-            # Smart date positioning with new format
-            date_text = format_date_readable(event['start_date'])
-            try:
-                date_bbox = get_text_dimensions(draw, date_text, font_small)
-                date_width = float(date_bbox[0])
-            except:
-                date_width = float(len(date_text) * 10 * scale_factor)
-            
-            date_y, date_above = get_optimal_date_position(
-                start_x, timeline_y, date_positions, date_width, False)
-            date_positions.append((float(start_x), float(date_y), float(date_width)))
-            
-            # Draw elegant date with background
-            date_padding = int(6 * scale_factor)
-            draw.rectangle([
-                int(start_x - date_width / 2.0 - date_padding), int(date_y - 3 * scale_factor),
-                int(start_x + date_width / 2.0 + date_padding), int(date_y + 18 * scale_factor)
-            ], fill='white', outline='gray', width=int(1 * scale_factor))
-            draw.text((int(start_x - date_width / 2.0), int(date_y)), date_text, fill='black', font=font_small)
-            
-            # Event description with elegant styling
-            event_text = str(event['event'])  # Ensure string type
-            try:
-                event_bbox = get_text_dimensions(draw, event_text, font_large)
-                event_width = float(event_bbox[0])
-            except:
-                event_width = float(len(event_text) * 16 * scale_factor)
-            
-            # Alternate text positioning
-            if i % 2 == 0:
-                text_y = float(timeline_y - 130 * scale_factor)
-                connection_start = (start_x, timeline_y - circle_radius)
-                connection_end = (start_x, text_y + 30 * scale_factor)
-            else:
-                text_y = float(timeline_y + 130 * scale_factor)
-                connection_start = (start_x, timeline_y + circle_radius)
-                connection_end = (start_x, text_y)
-            
-            # Elegant text background with shadow
-            text_padding = int(10 * scale_factor)
-            shadow_offset = int(3 * scale_factor)
-            
-            # Drop shadow
-            draw.rectangle([
-                int(start_x - event_width / 2.0 - text_padding + shadow_offset), int(text_y - 3 * scale_factor + shadow_offset),
-                int(start_x + event_width / 2.0 + text_padding + shadow_offset), int(text_y + 28 * scale_factor + shadow_offset)
-            ], fill=(200, 200, 200))
-            
-            # Main background
-            draw.rectangle([
-                int(start_x - event_width / 2.0 - text_padding), int(text_y - 3 * scale_factor),
-                int(start_x + event_width / 2.0 + text_padding), int(text_y + 28 * scale_factor)
-            ], fill='white', outline=color, width=int(2 * scale_factor))
-            
-            draw.text((int(start_x - event_width / 2.0), int(text_y)), event_text, fill=color, font=font_large)
-            
-            # Draw elegant curved connection line
-            draw_ultra_smooth_curve(draw, connection_start, connection_end, 'gray', 2 * scale_factor, 0.4)
-    
-    # Add elegant title with styling
-    point_events = len([e for e in parsed_events if not e['end_date']])
-    duration_events = len([e for e in parsed_events if e['end_date']])
-    title = f"Timeline: {point_events} Events, {duration_events} Duration Events"
-    
-    try:
-        title_bbox = get_text_dimensions(draw, title, font_title)
-        title_width = float(title_bbox[0])
-    except:
-        title_width = float(len(title) * 20 * scale_factor)
-    
-    # Title with elegant shadow
-    shadow_offset = int(4 * scale_factor)
-    draw.text((int(width / 2.0 - title_width / 2.0 + shadow_offset), int(40 * scale_factor + shadow_offset)), 
-             title, fill=(180, 180, 180), font=font_title)
-    draw.text((int(width / 2.0 - title_width / 2.0), int(40 * scale_factor)), title, fill='black', font=font_title)
-    
-    # Scale down for final output while maintaining quality
-    final_width = width // scale_factor
-    final_height = height // scale_factor
-    img = img.resize((final_width, final_height), Image.LANCZOS)
-    
-    # Apply subtle blur for softer appearance
-    img = img.filter(ImageFilter.SMOOTH_MORE)
-    
-    return img
+# Registered tiled timelines keep their per-zoom layouts; tile images go in render_cache
+tile_sets = LRUCache(max_entries=int(os.environ.get('TIMELINE_TILE_SETS', 32)))
+
+# Editing sessions keep their last image, so the store is bounded by bytes
+sessions = LRUCache(max_bytes=int(os.environ.get('TIMELINE_SESSION_BYTES', 256 * 1024 * 1024)),
+                    sizeof=lambda session: session.nbytes)
+
+# Async jobs wait in-process and are fed to the render pool one per worker
+job_queue = JobQueue(workers=app.config['RENDER_WORKERS'], max_pending=app.config['JOB_QUEUE_SIZE'],
+                     ttl=app.config['JOB_TTL'], retry_on=(RenderPoolFull,), error_status=_render_error_status,
+                     max_result_bytes=app.config['JOB_RESULT_BYTES'])
+
+def _with_cache_headers(response, key):
+    """Tag a rendered response with its content hash so clients can revalidate."""
+    response.set_etag(key)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _render_url(key, fmt):
+    """GET URL that serves the cached bytes of a render."""
+    return f'/renders/{key}.{fmt}'
+
+def _render_error_response(e):
+    """Map a render pool failure to a JSON error response, or None if e is not one."""
+    if isinstance(e, (RenderPoolFull, JobQueueFull)):
+        response = jsonify({'error': str(e)})
+        response.status_code = 429
+        response.headers['Retry-After'] = '1'
+        return response
+    if isinstance(e, RenderTimeout):
+        return jsonify({'error': 'Rendering took too long; try fewer events or a smaller size'}), 504
+    if isinstance(e, RenderPoolError):
+        return jsonify({'error': str(e)}), 503
+    return None
+
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+    g.stage_timer, g.stage_timer_token = push_timer()
+
+@app.after_request
+def _record_request_metrics(response):
+    """Observe the request's duration and stage totals, adding Server-Timing when asked for."""
+    timer = g.get('stage_timer')
+    if timer is None:
+        return response
+    elapsed = time.perf_counter() - g.request_start
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    request_seconds.observe(elapsed, endpoint=endpoint, status=response.status_code)
+    requests_total.inc(endpoint=endpoint, status=response.status_code)
+    observe_stages(timer)
+    if app.config['SERVER_TIMING'] or request.args.get('timing', '').lower() in ('1', 'true'):
+        response.headers['Server-Timing'] = server_timing(timer, elapsed)
+    return response
+
+@app.teardown_request
+def _stop_request_timer(exc):
+    token = g.pop('stage_timer_token', None)
+    if token is not None:
+        pop_timer(token)
+
+def warm_up():
+    """Warm this process's render caches and start the render workers, then report ready."""
+    import warmup  # Importing warms the caches
+    if render_pool is not None:
+        render_pool.start()
+    ready.set()
+
+def start_warm_up():
+    """Run warm_up() in a background thread, once per process."""
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(target=warm_up, name='warm-up', daemon=True)
+            _warm_up_thread.start()
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return jsonify({'status': 'ok'})
+
+@app.route('/ready')
+def readiness():
+    """Readiness: 200 once warm-up has finished, 503 before."""
+    if not ready.is_set():
+        # Whatever server runs the app, the first probe starts warm-up
+        # (gunicorn.conf.py starts it as soon as the web worker boots)
+        start_warm_up()
+        return jsonify({'ready': False}), 503
+    return jsonify({'ready': True})
 
 @app.route('/')
 def index():
     """Serve the main timeline creator page."""
     return render_template('index.html')
 
+@app.route('/cache_stats')
+def cache_stats():
+    """Report hit/miss counters for the renderer's caches."""
+    return jsonify({
+        'fonts': font_registry.stats(),
+        'sprites': marker_sprites.stats(),
+        'text_metrics': text_metrics.stats(),
+        'glyph_runs': glyph_runs.stats(),
+        'renders': render_cache.stats(),
+        'pool': render_pool.stats() if render_pool else None,
+        'jobs': job_queue.stats(),
+        'tile_sets': tile_sets.stats(),
+        'sessions': sessions.stats(),
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Render-stage histograms, request timings and cache counters in Prometheus text format."""
+    caches = {'fonts': font_registry.stats(), 'sprites': marker_sprites.stats(),
+              'text_metrics': text_metrics.stats(), 'glyph_runs': glyph_runs.stats(),
+              'renders': render_cache.stats(), 'tile_sets': tile_sets.stats(), 'sessions': sessions.stats()}
+    lines = []
+    for field, metric_type, help_text in [('hits', 'counter', 'Cache hits.'), ('misses', 'counter', 'Cache misses.'),
+                                          ('evictions', 'counter', 'Cache evictions.'),
+                                          ('entries', 'gauge', 'Entries held.'), ('bytes', 'gauge', 'Bytes held.')]:
+        suffix = '_total' if metric_type == 'counter' else ''
+        lines += stats_lines(f'timeline_cache_{field}{suffix}', help_text, metric_type, 'cache',
+                             {name: stats.get(field) for name, stats in caches.items()})
+    jobs = job_queue.stats()
+    lines += stats_lines('timeline_jobs', 'Jobs held by state.', 'gauge', 'state',
+                         {state: jobs[state] for state in ('queued', 'running', 'stored')})
+    lines += stats_lines('timeline_jobs_total', 'Jobs by outcome.', 'counter', 'outcome',
+                         {outcome: jobs[outcome] for outcome in ('completed', 'failed', 'expired', 'evicted', 'rejected')})
+    lines += stats_lines('timeline_jobs_stored_bytes', 'Bytes of finished job results held.', 'gauge', 'queue',
+                         {'jobs': jobs['stored_bytes']})
+    if render_pool is not None:
+        pool = render_pool.stats()
+        lines += stats_lines('timeline_render_pool', 'Render pool size and occupancy.', 'gauge', 'field',
+                             {field: pool[field] for field in ('workers', 'max_queue', 'in_flight')})
+        lines += stats_lines('timeline_render_pool_renders_total', 'Render pool outcomes.', 'counter', 'outcome',
+                             {field: pool[field] for field in ('submitted', 'rejected', 'timeouts', 'failures')})
+        lines += stats_lines('timeline_render_pool_restarts_total', 'Render pool restarts.', 'counter', 'pool',
+                             {'render': pool['restarts']})
+    return app.response_class(render_metrics(lines), mimetype='text/plain; version=0.0.4')
+
 @app.route('/upload_csv', methods=['POST'])
 def upload_csv():
     """Handle CSV file upload and parse timeline data."""
@@ -675,103 +225,380 @@ def upload_csv():
         if not file.filename.lower().endswith('.csv'):
             return jsonify({'error': 'File must be a CSV file'}), 400
         
-        # Read CSV data
-        csv_data = file.read().decode('utf-8')
-        csv_reader = csv.DictReader(io.StringIO(csv_data))
+        # Validate in one streaming pass, then stream the events back in a second;
+        # the upload is spooled by Werkzeug, so neither pass holds the whole file
+        text_stream = open_text_stream(file.stream)
+        try:
+            valid_count, errors, error_count = validate_csv(text_stream)
+        except UnicodeDecodeError:
+            return jsonify({'error': 'CSV file must be UTF-8 encoded'}), 400
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        events = []
-        for row_num, row in enumerate(csv_reader, 1):
-            try:
-                # Required fields
-                if 'date' not in row or 'event' not in row:
-                    return jsonify({'error': f'Row {row_num}: Missing required columns "date" and "event"'}), 400
-                
-                event = {
-                    'date': row['date'].strip(),
-                    'event': row['event'].strip()
-                }
-                
-                # Validate date format
-                try:
-                    datetime.strptime(event['date'], '%Y-%m-%d')
-                except ValueError:
-                    return jsonify({'error': f'Row {row_num}: Invalid date format. Use YYYY-MM-DD'}), 400
-                
-                # Optional fields
-                if 'end_date' in row and row['end_date'].strip():
-                    end_date = row['end_date'].strip()
-                    try:
-                        datetime.strptime(end_date, '%Y-%m-%d')
-                        event['end_date'] = end_date
-                    except ValueError:
-                        return jsonify({'error': f'Row {row_num}: Invalid end_date format. Use YYYY-MM-DD'}), 400
-                
-                if 'color' in row and row['color'].strip():
-                    color = row['color'].strip()
-                    if not color.startswith('#'):
-                        color = '#' + color
-                    if len(color) != 7:
-                        return jsonify({'error': f'Row {row_num}: Invalid color format. Use #RRGGBB'}), 400
-                    event['color'] = color
-                else:
-                    event['color'] = '#dc3545'  # Default red
-                
-                events.append(event)
-                
-            except Exception as e:
-                return jsonify({'error': f'Row {row_num}: {str(e)}'}), 400
+        if error_count:
+            return jsonify({
+                'error': error_summary(errors, error_count),
+                'errors': errors,
+                'error_count': error_count
+            }), 400
         
-        if not events:
+        if not valid_count:
             return jsonify({'error': 'No valid events found in CSV file'}), 400
         
-        return jsonify({
-            'success': True,
-            'events': events,
-            'message': f'Successfully imported {len(events)} events'
-        })
+        text_stream.seek(0)
+        return app.response_class(stream_with_context(stream_events_json(text_stream, valid_count)),
+                                  mimetype='application/json')
         
     except Exception as e:
         return jsonify({'error': f'Failed to process CSV file: {str(e)}'}), 500
 
+def parse_timeline_request(data, fmt='png'):
+    """Validate a render request body, returning (EventTable, options, encode_options) or raising ValueError."""
+    events = (data or {}).get('events', [])
+    
+    if not events:
+        raise ValueError('No events provided')
+    
+    # Validation parses every date once (CSV batches arrive already parsed); the renderer reuses the table
+    table = EventTable.coerce(events)
+    render_events.observe(len(table))
+    
+    return table, normalize_render_options(data), normalize_encode_options(fmt, data)
+
+def render_encoded(key, events, options, fmt='png', encode_options=None):
+    """Return encoded image bytes for key, rendering and caching them on a miss."""
+    data = render_cache.get(key)
+    if data is None:
+        with render_stages():
+            if render_pool is not None:
+                data = render_pool.render(events, options, fmt, encode_options)
+            else:
+                with stage('render'):
+                    data = render_timeline(events, options, fmt, encode_options)
+        render_cache.put(key, data)
+        output_bytes.observe(len(data), format=fmt)
+    return data
+
 @app.route('/generate_timeline', methods=['POST'])
 def generate_timeline():
-    """Generate and return a timeline image."""
+    """Generate and return a timeline image as a base64 data URI inside JSON."""
     try:
-        data = request.json
-        events = data.get('events', [])
-        
-        if not events:
-            return jsonify({'error': 'No events provided'}), 400
-        
-        # Validate events
-        for event in events:
-            if 'date' not in event or 'event' not in event:
-                return jsonify({'error': 'Each event must have date and event fields'}), 400
-            try:
-                datetime.strptime(event['date'], '%Y-%m-%d')
-                if event.get('end_date'):
-                    datetime.strptime(event['end_date'], '%Y-%m-%d')
-            except ValueError:
-                return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        try:
+            fmt = resolve_format((request.json or {}).get('format', 'png'))
+            table, options, encode_options = parse_timeline_request(request.json, fmt)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Generate timeline image
-        img = create_timeline_image(events)
-        if img is None:
-            return jsonify({'error': 'Failed to generate timeline'}), 500
+        # Identical events and options always produce the same image
+        key = render_key(table.to_dicts(), dict(options, format=fmt, encoder=encode_options))
+        img_data = render_encoded(key, table, options, fmt, encode_options)
         
         # Convert image to base64
-        img_buffer = io.BytesIO()
-        img.save(img_buffer, format='PNG', quality=95, optimize=True)
-        img_buffer.seek(0)
-        img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
+        with stage('base64'):
+            img_base64 = base64.b64encode(img_data).decode()
         
         return jsonify({
             'success': True,
-            'image': f'data:image/png;base64,{img_base64}'
+            'image': f'data:{OUTPUT_FORMATS[fmt]["mimetype"]};base64,{img_base64}',
+            'url': _render_url(key, fmt)
         })
         
+    except Exception as e:
+        return _render_error_response(e) or (jsonify({'error': str(e)}), 500)
+
+@app.route('/timeline.<fmt>', methods=['POST'])
+def timeline_image(fmt):
+    """Generate a timeline and return the encoded image bytes directly."""
+    try:
+        fmt = resolve_format(fmt)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    try:
+        try:
+            table, options, encode_options = parse_timeline_request(request.json, fmt)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        key = render_key(table.to_dicts(), dict(options, format=fmt, encoder=encode_options))
+        
+        # Serve the cached buffer as-is; Response sets Content-Length from it. POST responses
+        # are not revalidated: Content-Location names the GET URL that is
+        data = render_encoded(key, table, options, fmt, encode_options)
+        response = app.response_class(data, mimetype=OUTPUT_FORMATS[fmt]['mimetype'])
+        response.headers['Content-Location'] = _render_url(key, fmt)
+        return response
+        
+    except Exception as e:
+        return _render_error_response(e) or (jsonify({'error': str(e)}), 500)
+
+@app.route('/renders/<key>.<fmt>')
+def rendered_image(key, fmt):
+    """Serve a cached render by its key, with ETag/If-None-Match revalidation."""
+    try:
+        fmt = resolve_format(fmt)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    if not is_render_key(key):
+        return jsonify({'error': 'Unknown render'}), 404
+    # A key always names the same bytes, so a matching tag stays valid after eviction
+    if request.if_none_match.contains(key):
+        return _with_cache_headers(app.response_class(status=304), key)
+    data = render_cache.get(key)
+    if data is None:
+        return jsonify({'error': 'Unknown or expired render; POST the timeline again'}), 404
+    return _with_cache_headers(app.response_class(data, mimetype=OUTPUT_FORMATS[fmt]['mimetype']), key)
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """Queue a render and return its job id without waiting for the image."""
+    try:
+        try:
+            fmt = resolve_format((request.json or {}).get('format', 'png'))
+            table, options, encode_options = parse_timeline_request(request.json, fmt)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        key = render_key(table.to_dicts(), dict(options, format=fmt, encoder=encode_options))
+        data = render_cache.get(key)
+        if data is not None:
+            job = job_queue.add_finished(key, fmt, data)
+        else:
+            job = job_queue.submit(key, fmt, lambda: render_encoded(key, table, options, fmt, encode_options))
+        
+        response = jsonify(dict(job_queue.describe(job),
+                                status_url=f'/jobs/{job.id}', result_url=f'/jobs/{job.id}/result'))
+        response.status_code = 202
+        response.headers['Location'] = f'/jobs/{job.id}'
+        return response
+        
+    except Exception as e:
+        return _render_error_response(e) or (jsonify({'error': str(e)}), 500)
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Report a job's status, queue position and elapsed time."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    return jsonify(job_queue.describe(job))
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Serve a finished job's image bytes, or its status while it is still pending."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown or expired job'}), 404
+    if job.status == 'failed':
+        return jsonify({'error': job.error}), job.error_status
+    if job.status != 'done':
+        return jsonify(job_queue.describe(job)), 202
+    if request.if_none_match.contains(job.key):
+        return _with_cache_headers(app.response_class(status=304), job.key)
+    return _with_cache_headers(app.response_class(job.result, mimetype=OUTPUT_FORMATS[job.fmt]['mimetype']), job.key)
+
+@app.route('/tiles', methods=['POST'])
+def create_tile_set():
+    """Register a timeline for tiled viewing and describe its zoom levels."""
+    try:
+        try:
+            table, options, _ = parse_timeline_request(request.json)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        tile_set_id = render_key(table.to_dicts(), dict(options, tiled=True))
+        tile_set = tile_sets.get(tile_set_id)
+        if tile_set is None:
+            tile_set = TileSet(table, options)
+            tile_sets.put(tile_set_id, tile_set)
+        
+        return jsonify({
+            'tileset': tile_set_id,
+            'tile_size': TILE_SIZE,
+            'height': tile_set.output_size(0)[1],
+            'zooms': tile_set.info(),
+            'url_template': f'/tiles/{tile_set_id}/{{z}}/{{x}}.png'
+        })
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/tiles/<tile_set_id>/<int:z>/<int:x>.<fmt>')
+def tile_image(tile_set_id, z, x, fmt):
+    """Serve one tile of a registered timeline, rendering only that slice of the canvas."""
+    try:
+        fmt = resolve_format(fmt)
+        if fmt == 'svg':
+            raise ValueError('Tiles are raster only')
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    
+    # Tile set ids are render keys; anything else would also name a cache path outside the cache
+    if not is_render_key(tile_set_id):
+        return jsonify({'error': 'Unknown tileset'}), 404
+    key = f'{tile_set_id}-{z}-{x}.{fmt}'
+    if request.if_none_match.contains(key):
+        return _with_cache_headers(app.response_class(status=304), key)
+    
+    try:
+        data = render_cache.get(key)
+        if data is None:
+            tile_set = tile_sets.get(tile_set_id)
+            if tile_set is None:
+                return jsonify({'error': 'Unknown or expired tileset; register it again with POST /tiles'}), 404
+            if not tile_set.has_tile(z, x):
+                return jsonify({'error': 'Tile out of range'}), 404
+            with render_stages():
+                if render_pool is not None:
+                    data = render_pool.render_tile(tile_set_id, tile_set.events, tile_set.options, z, x, fmt)
+                else:
+                    with stage('render'):
+                        data = tile_set.render_tile_bytes(z, x, fmt)
+            render_cache.put(key, data)
+            output_bytes.observe(len(data), format=fmt)
+        return _with_cache_headers(app.response_class(data, mimetype=OUTPUT_FORMATS[fmt]['mimetype']), key)
+    except Exception as e:
+        return _render_error_response(e) or (jsonify({'error': str(e)}), 500)
+
+def _session_response(session_id, session, status=200):
+    response = jsonify(dict(session.last_render, session_id=session_id, version=session.version,
+                            events=session.event_list(), image_url=f'/sessions/{session_id}/image'))
+    response.status_code = status
+    return response
+
+@app.route('/sessions', methods=['POST'])
+def create_session():
+    """Start an editing session that keeps its layout and image between edits."""
+    try:
+        try:
+            fmt = resolve_format((request.json or {}).get('format', 'png'))
+            if fmt == 'svg':
+                raise ValueError('Editing sessions support raster formats only')
+            table, options, encode_options = parse_timeline_request(request.json, fmt)
+            session = TimelineSession(request.json['events'], options, fmt, encode_options, table)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        session_id = uuid.uuid4().hex
+        sessions.put(session_id, session)
+        response = _session_response(session_id, session, 201)
+        response.headers['Location'] = f'/sessions/{session_id}'
+        return response
+        
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/sessions/<session_id>', methods=['PATCH'])
+def patch_session(session_id):
+    """Apply add/update/delete patches and repaint only the regions they change."""
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': 'Unknown or expired session'}), 404
+    try:
+        patches = (request.json or {}).get('patches')
+        if not isinstance(patches, list) or not patches:
+            return jsonify({'error': 'patches must be a non-empty list'}), 400
+        with session.lock:
+            try:
+                session.apply(patches)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            sessions.put(session_id, session)  # Re-account its size
+            return _session_response(session_id, session)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+def delete_session(session_id):
+    """Drop a session and its kept image."""
+    sessions.pop(session_id)
+    return app.response_class(status=204)
+
+@app.route('/sessions/<session_id>/image')
+def session_image(session_id):
+    """Serve the session's current image bytes."""
+    session = sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': 'Unknown or expired session'}), 404
+    with session.lock:
+        etag, data = f'{session_id}-{session.version}', session.data
+    if request.if_none_match.contains(etag):
+        return _with_cache_headers(app.response_class(status=304), etag)
+    return _with_cache_headers(app.response_class(data, mimetype=OUTPUT_FORMATS[session.fmt]['mimetype']), etag)
+
+def _batch_render(job):
+    """Render one batch item through the cache, waiting for a free worker rather than failing."""
+    key, table, options, fmt, encode_options = job
+    while True:
+        try:
+            return render_encoded(key, table, options, fmt, encode_options)
+        except RenderPoolFull:
+            time.sleep(0.1)
+
+@app.route('/generate_batch', methods=['POST'])
+def generate_batch():
+    """Render many timelines in parallel and stream them back as a ZIP archive."""
+    try:
+        if 'file' in request.files:
+            # Multi-timeline CSV: options come from the form fields
+            common = request.form.to_dict()
+            try:
+                groups = group_csv_timelines(open_text_stream(request.files['file'].stream))
+            except UnicodeDecodeError:
+                return jsonify({'error': 'CSV file must be UTF-8 encoded'}), 400
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            timelines = [{'name': name, 'events': table, 'errors': (errors, error_count)}
+                         for name, (table, errors, error_count) in groups.items()]
+        else:
+            common = dict(request.json or {})
+            timelines = common.pop('timelines', None)
+            if not isinstance(timelines, list) or not timelines:
+                return jsonify({'error': 'timelines must be a non-empty list'}), 400
+        
+        if len(timelines) > MAX_BATCH_TIMELINES:
+            return jsonify({'error': f'A batch can hold at most {MAX_BATCH_TIMELINES} timelines'}), 400
+        try:
+            fmt = resolve_format(common.get('format', 'png'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Validate each timeline on its own so one bad item only fails itself
+        names = archive_names([timeline.get('name') if isinstance(timeline, dict) else None
+                               for timeline in timelines], fmt)
+        items = []
+        for timeline, file_name in zip(timelines, names):
+            if not isinstance(timeline, dict):
+                items.append({'name': file_name.rsplit('.', 1)[0], 'file': file_name,
+                              'error': 'Each timeline must be an object'})
+                continue
+            item = {'name': timeline.get('name') or file_name.rsplit('.', 1)[0], 'file': file_name}
+            errors, error_count = timeline.get('errors') or ([], 0)
+            try:
+                if error_count:
+                    raise ValueError(error_summary(errors, error_count))
+                request_data = dict(common, **{k: v for k, v in timeline.items() if k not in ('name', 'errors')})
+                table, options, encode_options = parse_timeline_request(request_data, fmt)
+                key = render_key(table.to_dicts(), dict(options, format=fmt, encoder=encode_options))
+                item['job'] = (key, table, options, fmt, encode_options)
+            except (ValueError, TypeError, AttributeError) as e:
+                item['error'] = str(e)
+            items.append(item)
+        
+        workers = render_pool.workers if render_pool is not None else 1
+        response = app.response_class(stream_with_context(stream_batch_zip(items, _batch_render, workers)),
+                                      mimetype='application/zip')
+        response.headers['Content-Disposition'] = 'attachment; filename=timelines.zip'
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+preload_fonts()
+
 if __name__ == '__main__':
+    # Development server. Under the debug reloader only the serving child
+    # (WERKZEUG_RUN_MAIN) warms up; use gunicorn.conf.py in production
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        warm_up()
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
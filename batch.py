@@ -0,0 +1,116 @@
+"""Batch rendering: many timelines rendered in parallel and streamed back as one ZIP archive.
+
+Each timeline is rendered as soon as a worker is free and written to the
+archive the moment it finishes, so the response starts flowing before the
+batch is done. Renders run at most two per worker ahead of the stream, so
+it never holds more than those in-flight images. A timeline that fails becomes an error entry instead of aborting the batch, and a final
+manifest.json lists every item's outcome.
+"""
+
+import json
+import zipfile
+from itertools import islice
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from werkzeug.utils import secure_filename
+
+MAX_BATCH_TIMELINES = 1000
+
+class _ChunkBuffer:
+    """Write-only file object that hands its contents out between ZIP entries."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def archive_names(names, extension):
+    """Safe, unique file names for the archive, in the order given."""
+    used = set()
+    result = []
+    for i, name in enumerate(names, 1):
+        base = secure_filename(str(name or '')) or f'timeline-{i}'
+        candidate = f'{base}.{extension}'
+        suffix = 2
+        while candidate in used:
+            candidate = f'{base}-{suffix}.{extension}'
+            suffix += 1
+        used.add(candidate)
+        result.append(candidate)
+    return result
+
+def stream_batch_zip(items, render, workers=1):
+    """Yield a ZIP archive in chunks while rendering items in parallel.
+
+    items is a list of dicts with 'name', 'file' and either 'job' (passed to
+    render) or 'error' (already failed validation). render(job) returns the
+    encoded bytes; any exception it raises is recorded for that item only.
+    """
+    buffer = _ChunkBuffer()
+    archive = zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED)  # Images are already compressed
+    manifest = []
+
+    def record(item, data=None, error=None):
+        entry = {'name': item['name'], 'status': 'error' if error else 'ok'}
+        if error:
+            entry['error'] = error
+            entry['file'] = item['file'] + '.error.txt'
+            archive.writestr(entry['file'], error + '\n')
+        else:
+            entry['file'] = item['file']
+            entry['bytes'] = len(data)
+            archive.writestr(item['file'], data)
+        manifest.append(entry)
+        return buffer.take()
+
+    executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='batch-render')
+    try:
+        jobs = []
+        for item in items:
+            if 'error' in item:
+                yield record(item, error=item['error'])
+            else:
+                jobs.append(item)
+
+        # Render at most a window ahead of the stream, so a slow client bounds the finished images held
+        queued = iter(jobs)
+        futures = {}
+        for item in islice(queued, 2 * max(1, workers)):
+            futures[executor.submit(render, item['job'])] = item
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            while done:
+                future = done.pop()
+                item = futures.pop(future)
+                try:
+                    data = future.result()
+                except Exception as e:
+                    chunk = record(item, error=str(e) or type(e).__name__)
+                else:
+                    chunk = record(item, data)
+                # The archive has the image now; let it go before waiting on the client
+                future = data = None
+                for item in islice(queued, 1):
+                    futures[executor.submit(render, item['job'])] = item
+                yield chunk
+
+        archive.writestr('manifest.json', json.dumps({
+            'count': len(manifest),
+            'failed': sum(entry['status'] == 'error' for entry in manifest),
+            'items': manifest,
+        }, indent=2))
+        archive.close()
+        yield buffer.take()
+    finally:
+        # A client that disconnects mid-stream closes this generator; drop the queued renders
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1 @@
+"""Benchmarks for the timeline renderer. Run modules with ``python -m benchmarks.<name>``."""
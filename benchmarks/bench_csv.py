@@ -0,0 +1,97 @@
+"""CSV upload ingestion: original read-decode-StringIO path vs. streaming validation.
+
+Both paths go from the uploaded bytes to the JSON response body. Times are
+measured without tracing; peak memory is a separate tracemalloc run.
+Usage: python -m benchmarks.bench_csv [--rows 10000 1000000] [--legacy-max 1000000]
+"""
+
+import io
+import os
+import csv
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from csv_ingest import open_text_stream, stream_events_json, validate_csv
+
+def write_csv(path, rows, seed=42):
+    """Write a CSV with the sample's columns; a third of the rows are durations."""
+    rng = random.Random(seed)
+    base = date(2000, 1, 1)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['date', 'event', 'end_date', 'color'])
+        for i in range(rows):
+            start = base + timedelta(days=rng.randrange(9000))
+            end = (start + timedelta(days=rng.randrange(1, 400))).isoformat() if i % 3 == 0 else ''
+            writer.writerow([start.isoformat(), f'Event {i}', end, '#%06x' % rng.randrange(0x1000000)])
+
+def legacy_ingest(f):
+    """The original upload_csv body: whole-file decode, row dicts, then jsonify."""
+    csv_data = f.read().decode('utf-8')
+    csv_reader = csv.DictReader(io.StringIO(csv_data))
+    events = []
+    for row in csv_reader:
+        event = {'date': row['date'].strip(), 'event': row['event'].strip()}
+        datetime.strptime(event['date'], '%Y-%m-%d')
+        if row['end_date'].strip():
+            datetime.strptime(row['end_date'].strip(), '%Y-%m-%d')
+            event['end_date'] = row['end_date'].strip()
+        event['color'] = row['color'].strip() or '#dc3545'
+        events.append(event)
+    return len(json.dumps({'success': True, 'events': events, 'message': f'Successfully imported {len(events)} events'}))
+
+def streaming_ingest(f):
+    """Validation pass, then the chunked response generator consumed like a WSGI server would."""
+    text_stream = open_text_stream(f)
+    valid_count, errors, error_count = validate_csv(text_stream)
+    text_stream.seek(0)
+    size = 0
+    for chunk in stream_events_json(text_stream, valid_count):
+        size += len(chunk)
+    text_stream.detach()
+    return size
+
+def measure(func, path):
+    with open(path, 'rb') as f:
+        start = time.perf_counter()
+        func(f)
+        elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    with open(path, 'rb') as f:
+        func(f)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 1000000])
+    parser.add_argument('--legacy-max', type=int, default=1000000,
+                        help='skip the whole-file baseline above this many rows')
+    args = parser.parse_args()
+
+    print(f"{'rows':>9}{'file MB':>9}{'legacy ms':>11}{'legacy MB':>11}{'stream ms':>11}{'stream MB':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = os.path.join(tmp, f'{rows}.csv')
+            write_csv(path, rows)
+            file_mb = os.path.getsize(path) / 1e6
+
+            stream_time, stream_peak = measure(streaming_ingest, path)
+            if rows <= args.legacy_max:
+                legacy_time, legacy_peak = measure(legacy_ingest, path)
+                legacy_ms, legacy_mb = f'{legacy_time * 1000:.0f}', f'{legacy_peak / 1e6:.1f}'
+            else:
+                legacy_ms, legacy_mb = 'skipped', '-'
+
+            print(f"{rows:>9}{file_mb:>9.1f}{legacy_ms:>11}{legacy_mb:>11}"
+                  f"{stream_time * 1000:>11.0f}{stream_peak / 1e6:>11.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Compare the vectorized curve engine against the original per-segment loop.
+
+Both must paint the same pixels; the benchmark exits non-zero if they differ.
+Usage: python -m benchmarks.bench_curves [--events 500] [--repeat 3]
+"""
+
+import sys
+import argparse
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from curves import resolve_color, curve_control_points, draw_ultra_smooth_curve, draw_flowing_branch
+
+SCALE = 2
+WIDTH, HEIGHT = 2000 * SCALE, 1000 * SCALE
+TIMELINE_Y = HEIGHT // 2
+
+def legacy_curve(draw, start_point, end_point, color, width=2, curve_factor=0.5):
+    """The original pure-Python implementation: one draw.line call per segment."""
+    color = resolve_color(color)
+    controls, distance = curve_control_points(start_point, end_point, curve_factor)
+    (x1, y1), (cx1, cy1), (cx2, cy2), (x2, y2) = controls.tolist()
+    segments = max(50, int(distance / 3))
+    points = []
+    for i in range(segments + 1):
+        t = i / segments
+        mt = 1 - t
+        x = mt**3 * x1 + 3 * mt**2 * t * cx1 + 3 * mt * t**2 * cx2 + t**3 * x2
+        y = mt**3 * y1 + 3 * mt**2 * t * cy1 + 3 * mt * t**2 * cy2 + t**3 * y2
+        points.append((int(x), int(y)))
+    for i in range(len(points) - 1):
+        draw.line([points[i], points[i + 1]], fill=color, width=int(width))
+    if width > 2:
+        lighter_color = tuple(min(255, int(c + (255-c)*0.3)) for c in color)
+        for i in range(len(points) - 1):
+            draw.line([points[i], points[i + 1]], fill=lighter_color, width=max(1, int(width)-1))
+
+def legacy_branch(draw, start_x, timeline_y, branch_y, end_x, color, width=4):
+    """The original four-curve branch built on legacy_curve."""
+    branch_distance = abs(branch_y - timeline_y)
+    if abs(end_x - start_x) > 20:
+        quarter_x = start_x + (end_x - start_x) * 0.25
+        three_quarter_x = start_x + (end_x - start_x) * 0.75
+        mid_x = (start_x + end_x) / 2
+        curve_offset = branch_distance * 0.3
+        mid_y1 = timeline_y + (branch_y - timeline_y) * 0.7
+        mid_y2 = branch_y + (curve_offset if branch_y > timeline_y else -curve_offset)
+        legacy_curve(draw, (start_x, timeline_y), (quarter_x, mid_y1), color, width, 0.8)
+        legacy_curve(draw, (quarter_x, mid_y1), (mid_x, mid_y2), color, width, 0.6)
+        legacy_curve(draw, (mid_x, mid_y2), (three_quarter_x, mid_y1), color, width, 0.6)
+        legacy_curve(draw, (three_quarter_x, mid_y1), (end_x, timeline_y), color, width, 0.8)
+    else:
+        mid_x = (start_x + end_x) / 2
+        peak_y = branch_y + (branch_distance * 0.3 if branch_y > timeline_y else -branch_distance * 0.3)
+        legacy_curve(draw, (start_x, timeline_y), (mid_x, peak_y), color, width, 0.7)
+        legacy_curve(draw, (mid_x, peak_y), (end_x, timeline_y), color, width, 0.7)
+
+def draw_point_events(curve, count):
+    """Draw the three curves create_timeline_image uses per point event."""
+    img = Image.new('RGB', (WIDTH, HEIGHT), 'white')
+    draw = ImageDraw.Draw(img)
+    for i in range(count):
+        x = 300 + (i * 37) % (WIDTH - 600)
+        curve(draw, (x, TIMELINE_Y - 70 * SCALE), (x, TIMELINE_Y), (220, 53, 69), 4 * SCALE, 0.3)
+        curve(draw, (x, TIMELINE_Y), (x, TIMELINE_Y + 70 * SCALE), (220, 53, 69), 4 * SCALE, 0.3)
+        curve(draw, (x, TIMELINE_Y - 20 * SCALE), (x, TIMELINE_Y - 230 * SCALE), 'gray', 2 * SCALE, 0.4)
+    return img
+
+def draw_duration_events(branch, count):
+    """Draw one flowing branch per duration event."""
+    img = Image.new('RGB', (WIDTH, HEIGHT), 'white')
+    draw = ImageDraw.Draw(img)
+    for i in range(count):
+        start_x = 300 + (i * 37) % (WIDTH - 1200)
+        branch_y = TIMELINE_Y + (-1 if i % 2 else 1) * (80 + (i % 8) * 60) * SCALE
+        branch(draw, start_x, TIMELINE_Y, branch_y, start_x + 200 + (i * 53) % 600, (0, 123, 255), 6 * SCALE)
+    return img
+
+def best_of(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    cases = [
+        ('point', lambda: draw_point_events(legacy_curve, args.events),
+                  lambda: draw_point_events(draw_ultra_smooth_curve, args.events)),
+        ('duration', lambda: draw_duration_events(legacy_branch, args.events),
+                     lambda: draw_duration_events(draw_flowing_branch, args.events)),
+    ]
+    print(f"{'events':<10}{'kind':<10}{'legacy ms':>12}{'vector ms':>12}{'speedup':>10}{'differing px':>14}")
+    failures = 0
+    for kind, legacy, vectorized in cases:
+        legacy_time = best_of(legacy, args.repeat)
+        vector_time = best_of(vectorized, args.repeat)
+        differing = np.count_nonzero(np.any(np.asarray(legacy()) != np.asarray(vectorized()), axis=2))
+        failures += differing > 0
+        print(f"{args.events:<10}{kind:<10}{legacy_time * 1000:>12.1f}{vector_time * 1000:>12.1f}"
+              f"{legacy_time / vector_time:>9.1f}x{differing:>14}")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
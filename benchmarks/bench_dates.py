@@ -0,0 +1,117 @@
+"""Date parsing: strptime('%Y-%m-%d') vs. dates.parse_day vs. dates.parse_days (batch).
+
+Before timing, a differential check runs all three parsers over a seeded corpus
+of valid, unpadded, space-padded, out-of-range, mutated and non-string inputs
+and exits non-zero if any input is accepted or rejected differently, or parsed
+to a different day.
+Usage: python -m benchmarks.bench_dates [--rows 100000] [--corpus 200000]
+"""
+
+import sys
+import random
+import argparse
+import time
+from datetime import date, datetime, timedelta
+
+from dates import EPOCH_ORDINAL, parse_day, parse_days
+
+MUTATION_CHARS = '0123456789-/ .:T+aZ\x00٠٣１²'
+
+def strptime_day(text):
+    """The old path, as an epoch day or None when rejected."""
+    try:
+        return datetime.strptime(text, '%Y-%m-%d').toordinal() - EPOCH_ORDINAL
+    except (TypeError, ValueError):
+        return None
+
+def fast_day(text):
+    try:
+        return parse_day(text)
+    except (TypeError, ValueError):
+        return None
+
+def make_corpus(size, seed=42):
+    """Mixed inputs: about half canonical dates, the rest edge cases and mutations."""
+    rng = random.Random(seed)
+    base = date(1, 1, 1)
+    corpus = [None, 5, 2020.0, b'2020-01-01', '', '2020-02-29', '2021-02-29', '1900-02-29', '2000-02-29',
+              '0000-01-01', '0001-01-01', '9999-12-31', '2020-1-1', '2020-01- 3', '2020- 1-03', '20200101',
+              '2020-01-01T00:00', ' 2020-01-01', '2020-01-01 ', '+020-01-01', '2020-00-01', '2020-01-00',
+              '2020-01-32', '2020-13-01', '٢٠٢٠-01-01', '２020-01-01']
+    while len(corpus) < size:
+        day = base + timedelta(days=rng.randrange(3652058))
+        text = day.isoformat()
+        kind = rng.random()
+        if kind < 0.5:
+            corpus.append(text)
+        elif kind < 0.6:
+            corpus.append(f'{day.year:04d}-{day.month}-{day.day}')
+        elif kind < 0.65:
+            corpus.append(f'{day.year:04d}-{day.month:02d}-{day.day:2d}')
+        elif kind < 0.75:
+            corpus.append(f'{day.year:04d}-{rng.randrange(0, 14):02d}-{rng.randrange(0, 33):02d}')
+        else:
+            chars = list(text)
+            for _ in range(rng.randrange(1, 3)):
+                op = rng.random()
+                pos = rng.randrange(len(chars) + 1)
+                if op < 0.5 and pos < len(chars):
+                    chars[pos] = rng.choice(MUTATION_CHARS)
+                elif op < 0.75:
+                    chars.insert(pos, rng.choice(MUTATION_CHARS))
+                elif chars:
+                    del chars[min(pos, len(chars) - 1)]
+            corpus.append(''.join(chars))
+    return corpus
+
+def differential_check(corpus):
+    """Return a list of (input, strptime, parse_day, parse_days) rows that disagree."""
+    days, bad = parse_days(corpus)
+    bad = set(bad)
+    mismatches = []
+    for i, text in enumerate(corpus):
+        expected = strptime_day(text)
+        batch = None if i in bad else int(days[i])
+        if not (expected == fast_day(text) == batch):
+            mismatches.append((text, expected, fast_day(text), batch))
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100000, help='canonical dates to time')
+    parser.add_argument('--corpus', type=int, default=200000, help='inputs in the differential check')
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.corpus)
+    mismatches = differential_check(corpus)
+    accepted = sum(strptime_day(text) is not None for text in corpus)
+    print(f'differential check: {len(corpus)} inputs, {accepted} accepted, {len(mismatches)} mismatches')
+    for row in mismatches[:20]:
+        print('  mismatch', row)
+    if mismatches:
+        sys.exit(1)
+
+    rng = random.Random(7)
+    texts = [(date(1970, 1, 1) + timedelta(days=rng.randrange(30000))).isoformat() for _ in range(args.rows)]
+
+    start = time.perf_counter()
+    for text in texts:
+        datetime.strptime(text, '%Y-%m-%d')
+    strptime_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in texts:
+        parse_day(text)
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parse_days(texts)
+    batch_time = time.perf_counter() - start
+
+    print(f"{'parser':<22}{'total ms':>10}{'ns/date':>10}{'speedup':>9}")
+    for name, elapsed in (('strptime', strptime_time), ('parse_day (scalar)', scalar_time),
+                          ('parse_days (batch)', batch_time)):
+        print(f'{name:<22}{elapsed * 1000:>10.1f}{elapsed / args.rows * 1e9:>10.0f}{strptime_time / elapsed:>8.1f}x')
+
+if __name__ == '__main__':
+    main()
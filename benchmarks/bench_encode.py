@@ -0,0 +1,69 @@
+"""Encode time vs. output size per format on sample_timeline.csv at several output sizes.
+
+Usage: python -m benchmarks.bench_encode [--csv sample_timeline.csv] [--repeat 3]
+"""
+
+import argparse
+import csv
+import io
+import os
+import time
+
+from app import create_timeline_image
+from encoders import encode_image
+
+SIZES = [
+    ('1000x500 draft', {'quality': 'draft', 'width': 1000, 'height': 500}),
+    ('2000x1000 standard', {'quality': 'standard'}),
+    ('4000x2000 print', {'quality': 'print'}),
+]
+
+CONFIGS = [
+    ('png optimize (old)', 'png', None),
+    ('png level 1 (default)', 'png', {}),
+    ('png level 6', 'png', {'compress_level': 6}),
+    ('png palette 256', 'png', {'palette': 256}),
+    ('webp lossy (default)', 'webp', {}),
+    ('webp lossless', 'webp', {'lossless': True}),
+    ('jpeg (default)', 'jpeg', {}),
+]
+
+def load_events(path):
+    with open(path, newline='') as f:
+        events = []
+        for row in csv.DictReader(f):
+            event = {'date': row['date'], 'event': row['event'], 'color': row.get('color') or '#dc3545'}
+            if row.get('end_date'):
+                event['end_date'] = row['end_date']
+            events.append(event)
+    return events
+
+def encode(img, fmt, options):
+    if options is None:
+        # The previous hard-coded encoder
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG', quality=95, optimize=True)
+        return buffer.getvalue()
+    return encode_image(img, fmt, **options)
+
+def main():
+    default_csv = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_timeline.csv')
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--csv', default=default_csv)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    events = load_events(args.csv)
+    print(f"{'size':<20}{'encoder':<24}{'ms':>8}{'KB':>10}")
+    for size_name, options in SIZES:
+        img = create_timeline_image(events, **options)
+        for config_name, fmt, encode_options in CONFIGS:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                data = encode(img, fmt, encode_options)
+                timings.append(time.perf_counter() - start)
+            print(f"{size_name:<20}{config_name:<24}{min(timings) * 1000:>8.1f}{len(data) / 1024:>10.1f}")
+
+if __name__ == '__main__':
+    main()
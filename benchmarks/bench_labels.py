@@ -0,0 +1,85 @@
+"""Date-label placement: original linear scan vs. the grid-backed LabelIndex.
+
+Usage: python -m benchmarks.bench_labels [--sizes 100 1000 10000] [--legacy-max 1000]
+"""
+
+import argparse
+import random
+import time
+
+from labels import LabelIndex, get_optimal_date_position
+
+SCALE = 2
+TIMELINE_START, TIMELINE_END = 150 * SCALE, 1850 * SCALE
+TIMELINE_Y = 500 * SCALE
+
+def legacy_date_position(x_pos, timeline_y, existing_positions, text_width):
+    """The original O(n) scan over every placed label per candidate position."""
+    base_y = timeline_y + 25
+    alternative_y = timeline_y - 45
+    margin = 15
+
+    def check_overlap(x, y, width):
+        for existing_x, existing_y, existing_width in existing_positions:
+            if abs(x - existing_x) < (width + existing_width) / 2 + margin and abs(y - existing_y) < 25:
+                return True
+        return False
+
+    if not check_overlap(x_pos, base_y, text_width):
+        return base_y
+    if not check_overlap(x_pos, alternative_y, text_width):
+        return alternative_y
+    for offset in range(25, 120, 25):
+        if not check_overlap(x_pos, base_y + offset, text_width):
+            return base_y + offset
+        if not check_overlap(x_pos, alternative_y - offset, text_width):
+            return alternative_y - offset
+    return base_y
+
+def make_labels(count, seed=42):
+    """Sorted x positions with date-label widths, as create_timeline_image produces them."""
+    rng = random.Random(seed)
+    xs = sorted(rng.uniform(TIMELINE_START, TIMELINE_END) for _ in range(count))
+    return [(x, rng.uniform(180, 280)) for x in xs]
+
+def run_legacy(labels):
+    positions = []
+    for x, width in labels:
+        y = legacy_date_position(x, TIMELINE_Y, positions, width)
+        positions.append((x, y, width))
+    return [y for _, y, _ in positions]
+
+def run_indexed(labels):
+    index = LabelIndex(cell_width=100 * SCALE, cell_height=25 * SCALE)
+    placed = []
+    for x, width in labels:
+        y, _ = get_optimal_date_position(x, TIMELINE_Y, index, width)
+        index.add_date_label(x, y, width)
+        placed.append(y)
+    return placed
+
+def timed(func, labels):
+    start = time.perf_counter()
+    result = func(labels)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--legacy-max', type=int, default=1000,
+                        help='skip the quadratic baseline above this many labels')
+    args = parser.parse_args()
+
+    print(f"{'labels':>8}{'legacy ms':>12}{'grid ms':>12}{'grid us/label':>15}  same placement")
+    for count in args.sizes:
+        labels = make_labels(count)
+        grid_time, grid_result = timed(run_indexed, labels)
+        if count <= args.legacy_max:
+            legacy_time, legacy_result = timed(run_legacy, labels)
+            legacy_ms, same = f'{legacy_time * 1000:.1f}', str(legacy_result == grid_result)
+        else:
+            legacy_ms, same = 'skipped', '-'
+        print(f"{count:>8}{legacy_ms:>12}{grid_time * 1000:>12.1f}{grid_time / count * 1e6:>15.1f}  {same}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""Duration lane layout: original used_positions while-loop vs. assign_lanes.
+
+The layout is pure data, so this runs without drawing anything.
+Usage: python -m benchmarks.bench_lanes [--sizes 100 1000 10000] [--legacy-max 1000]
+"""
+
+import argparse
+import random
+import time
+
+from lanes import assign_lanes
+
+SCALE = 2
+LANE_SPACING = 60 * SCALE
+
+def legacy_offsets(count):
+    """The original loop: offsets only ever grow, each step rescans every used offset."""
+    used_positions = []
+    for i in range(count):
+        y_offset = 0
+        while any(abs(pos - y_offset) < LANE_SPACING for pos in used_positions):
+            y_offset += LANE_SPACING if i % 2 == 0 else -LANE_SPACING
+        used_positions.append(y_offset)
+    return used_positions
+
+def make_intervals(count, seed=42):
+    """Duration extents in canvas pixels spread across a 2000px-wide (2x) timeline."""
+    rng = random.Random(seed)
+    intervals = []
+    for _ in range(count):
+        start = rng.uniform(300, 3500)
+        intervals.append((start, start + rng.uniform(50, 600)))
+    return intervals
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--legacy-max', type=int, default=1000,
+                        help='skip the quadratic baseline above this many durations')
+    args = parser.parse_args()
+
+    print(f"{'durations':>10}{'legacy ms':>12}{'legacy lanes':>14}{'sweep ms':>11}{'sweep lanes':>13}")
+    for count in args.sizes:
+        intervals = make_intervals(count)
+        sides = [i % 2 for i in range(count)]
+
+        start = time.perf_counter()
+        lanes = assign_lanes(intervals, sides=sides, gap=40)
+        sweep_time = time.perf_counter() - start
+        sweep_lanes = max(lanes) + 1 if lanes else 0
+
+        if count <= args.legacy_max:
+            start = time.perf_counter()
+            offsets = legacy_offsets(count)
+            legacy_ms = f'{(time.perf_counter() - start) * 1000:.1f}'
+            legacy_lanes = str(len(set(offsets)))
+        else:
+            legacy_ms, legacy_lanes = 'skipped', '-'
+
+        print(f"{count:>10}{legacy_ms:>12}{legacy_lanes:>14}{sweep_time * 1000:>11.1f}{sweep_lanes:>13}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""Benchmark suite over synthetic timelines, with JSON baselines and regression gates.
+
+For every shape and size from benchmarks.synthetic it measures
+  render_ms             create_timeline_image on a parsed EventTable
+  upload_csv_ms         POST /upload_csv through the Flask test client, streamed body included
+  generate_timeline_ms  POST /generate_timeline through the test client (parse, render, encode, base64)
+  peak_rss_mb           peak RSS growth of one /generate_timeline request, in a fresh process
+Timings are the best of up to --repeat runs, fewer once a measurement has used
+--budget seconds. The app is imported with the render cache disabled and
+TIMELINE_RENDER_WORKERS=0, so every request renders in this process.
+--save writes the results as a baseline; --compare exits 1 when a metric is
+more than --threshold slower (or larger) than the baseline.
+Usage: python -m benchmarks.bench_suite [--sizes 10 100 1000] [--shapes point_heavy] [--save baseline.json]
+       python -m benchmarks.bench_suite --compare baseline.json [--threshold 0.25]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import multiprocessing
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import PIL
+
+from benchmarks.synthetic import SHAPES, SIZES, generate, to_csv
+from events import EventTable
+from raster import create_timeline_image
+
+try:
+    import resource
+except ImportError:  # Windows: peak memory is not reported
+    resource = None
+
+METRICS = ('render_ms', 'upload_csv_ms', 'generate_timeline_ms', 'peak_rss_mb')
+
+# Changes smaller than this are noise however large the ratio (tiny cases)
+NOISE_FLOORS = {'ms': 2.0, 'mb': 2.0}
+
+def load_app():
+    """Import the Flask app configured to render every request in this process, uncached."""
+    os.environ['TIMELINE_RENDER_WORKERS'] = '0'
+    os.environ['TIMELINE_RENDER_CACHE_BYTES'] = '0'
+    os.environ.pop('TIMELINE_RENDER_CACHE_DIR', None)
+    from app import app
+    return app
+
+def best_of(func, repeat, budget):
+    """Minimum wall time of func() in ms over up to repeat runs, stopping once budget seconds are spent."""
+    times = []
+    while len(times) < repeat and sum(times) < budget:
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return round(min(times) * 1000, 2)
+
+def post_csv(client, data):
+    response = client.post('/upload_csv', data={'file': (io.BytesIO(data), 'timeline.csv')},
+                           content_type='multipart/form-data')
+    response.get_data()  # Drain the streamed body
+    if response.status_code != 200:
+        raise RuntimeError(f'/upload_csv returned {response.status_code}: {response.get_data(as_text=True)[:200]}')
+
+def post_timeline(client, events):
+    response = client.post('/generate_timeline', json={'events': events})
+    if response.status_code != 200:
+        raise RuntimeError(f'/generate_timeline returned {response.status_code}: '
+                           f'{response.get_data(as_text=True)[:200]}')
+
+def max_rss_mb():
+    """This process's peak resident set size in MB."""
+    try:
+        # Linux carries ru_maxrss over fork and exec, so a spawned child would report
+        # its parent's peak; VmHWM belongs to this process alone
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024  # bytes on macOS, KiB elsewhere
+
+def peak_rss_case(shape, count, seed):
+    """Run in a fresh process: peak RSS growth in MB of one /generate_timeline request over the loaded app.
+
+    No warm-up request: it would set the high-water mark this measures. Fonts are
+    already preloaded by importing the app.
+    """
+    client = load_app().test_client()
+    events = generate(shape, count, seed)
+    before = max_rss_mb()
+    post_timeline(client, events)
+    return round(max_rss_mb() - before, 1)
+
+def measure_peak_rss(shape, count, seed):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        return executor.submit(peak_rss_case, shape, count, seed).result()
+
+def run_case(client, shape, count, args):
+    events = generate(shape, count, args.seed)
+    table = EventTable.from_events(events)
+    csv_data = to_csv(events)
+    return {
+        'events': count,
+        'render_ms': best_of(lambda: create_timeline_image(table), args.repeat, args.budget),
+        'upload_csv_ms': best_of(lambda: post_csv(client, csv_data), args.repeat, args.budget),
+        'generate_timeline_ms': best_of(lambda: post_timeline(client, events), args.repeat, args.budget),
+        'peak_rss_mb': measure_peak_rss(shape, count, args.seed) if resource and args.memory else None,
+    }
+
+def run_suite(args):
+    client = load_app().test_client()
+    post_timeline(client, generate('point_heavy', 10))  # Warm fonts, sprites and text caches
+    results = {}
+    print(f"{'case':<24}{'render ms':>11}{'upload ms':>11}{'round trip ms':>15}{'peak MB':>9}")
+    for shape in args.shapes:
+        for count in args.sizes:
+            case = f'{shape}/{count}'
+            result = results[case] = run_case(client, shape, count, args)
+            peak = '-' if result['peak_rss_mb'] is None else f"{result['peak_rss_mb']:.1f}"
+            print(f"{case:<24}{result['render_ms']:>11.1f}{result['upload_csv_ms']:>11.1f}"
+                  f"{result['generate_timeline_ms']:>15.1f}{peak:>9}", flush=True)
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pillow': PIL.__version__,
+            'numpy': np.__version__,
+            'cpus': os.cpu_count(),
+            'seed': args.seed,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+
+def compare(baseline, current, threshold):
+    """Print each metric's change against the baseline; return the list of regressions."""
+    regressions = []
+    for key in ('python', 'pillow', 'numpy', 'platform'):
+        if baseline['meta'].get(key) != current['meta'].get(key):
+            print(f"note: {key} differs from the baseline ({baseline['meta'].get(key)} -> {current['meta'].get(key)})")
+    print(f"\n{'case':<24}{'metric':<22}{'baseline':>10}{'current':>10}{'change':>9}")
+    for case, result in current['results'].items():
+        old_result = baseline['results'].get(case)
+        if old_result is None:
+            continue
+        for metric in METRICS:
+            old, new = old_result.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old if old else 0.0
+            regressed = change > threshold and new - old > NOISE_FLOORS[metric.rsplit('_', 1)[1]]
+            if regressed:
+                regressions.append((case, metric, old, new))
+            print(f"{case:<24}{metric:<22}{old:>10.1f}{new:>10.1f}{change:>+8.0%}{'  REGRESSED' if regressed else ''}")
+    return regressions
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--shapes', nargs='+', default=list(SHAPES), choices=SHAPES)
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--budget', type=float, default=5.0, help='seconds after which a measurement stops repeating')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help='skip the peak RSS processes')
+    parser.add_argument('--save', metavar='PATH', help='write the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='BASELINE', help='compare against a saved baseline')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown as a fraction (0.25 = 25%%)')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)  # Fail before the (long) run if the baseline is unreadable
+
+    current = run_suite(args)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f'\nSaved {args.save}')
+
+    if baseline is not None:
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f'\n{len(regressions)} metric(s) regressed more than {args.threshold:.0%}:')
+            for case, metric, old, new in regressions:
+                print(f'  {case} {metric}: {old:.1f} -> {new:.1f}')
+            return 1
+        print(f'\nNo regressions beyond {args.threshold:.0%}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""Text share of render time, with cold and warm text caches.
+
+Renders a synthetic timeline of point events (dates repeat across events) and
+reports the seconds spent measuring and drawing text, as recorded by the
+caches, against the whole render.
+Usage: python -m benchmarks.bench_text [--events 200 2000] [--repeat 3]
+"""
+
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from events import EventTable
+from raster import create_timeline_image
+from text_cache import glyph_runs, text_metrics
+
+def make_events(count, seed=42):
+    """Point events over five years, so many dates and their labels repeat."""
+    rng = random.Random(seed)
+    base = date(2020, 1, 1)
+    return [{'date': (base + timedelta(days=rng.randrange(5 * 365))).isoformat(), 'event': f'Milestone {i % 50}'}
+            for i in range(count)]
+
+def text_seconds():
+    return text_metrics.stats()['seconds'], glyph_runs.stats()['seconds']
+
+def timed_render(table):
+    measure_before, draw_before = text_seconds()
+    start = time.perf_counter()
+    create_timeline_image(table, cluster=False)
+    total = time.perf_counter() - start
+    measure_after, draw_after = text_seconds()
+    return total, measure_after - measure_before, draw_after - draw_before
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, nargs='+', default=[200, 2000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'events':>8}  {'caches':<6}{'render ms':>11}{'measure ms':>12}{'draw ms':>10}{'text %':>8}")
+    for count in args.events:
+        table = EventTable.from_events(make_events(count))
+        text_metrics.clear()
+        glyph_runs.clear()
+        runs = [('cold', timed_render(table))]
+        runs += [('warm', min((timed_render(table) for _ in range(args.repeat)), key=lambda run: run[0]))]
+        for name, (total, measure, draw) in runs:
+            share = (measure + draw) / total * 100
+            print(f"{count:>8}  {name:<6}{total * 1000:>11.1f}{measure * 1000:>12.1f}{draw * 1000:>10.1f}{share:>7.1f}%")
+
+if __name__ == '__main__':
+    main()
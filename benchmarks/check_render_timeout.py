@@ -0,0 +1,56 @@
+"""Timeout check: a render over its budget must end with 504 from the worker's own alarm.
+
+Posts a timeline far too big for each short render budget in turn, so the
+alarm lands in different render stages, and checks that every request fails
+with 504 before the parent's hard limit would kill the pool and that the
+pool is never restarted. Exits non-zero if any budget fails.
+Usage: python -m benchmarks.check_render_timeout [--events 3000] [--budgets 0.3 0.5 1 2]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+from benchmarks.synthetic import generate
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=3000)
+    parser.add_argument('--budgets', type=float, nargs='+', default=[0.3, 0.5, 1.0, 2.0],
+                        help='render timeouts to try, in seconds')
+    args = parser.parse_args()
+
+    # The app reads its render pool settings at import time
+    os.environ['TIMELINE_RENDER_WORKERS'] = '1'
+    from app import app, render_pool
+    from render_pool import HARD_TIMEOUT_GRACE
+
+    client = app.test_client()
+    events = generate('point_heavy', args.events, 0)
+    failures = 0
+    try:
+        render_pool.start()
+        for budget in args.budgets:
+            render_pool.timeout = budget
+            restarts = render_pool.stats()['restarts']
+            start = time.perf_counter()
+            response = client.post('/timeline.png', json={'events': events, 'quality': 'print', 'cluster': False})
+            elapsed = time.perf_counter() - start
+            restarted = render_pool.stats()['restarts'] - restarts
+            problems = []
+            if response.status_code != 504:
+                problems.append('expected 504')
+            if elapsed >= budget + HARD_TIMEOUT_GRACE:
+                problems.append('waited for the hard limit')
+            if restarted:
+                problems.append('pool restarted')
+            failures += bool(problems)
+            print(f'{budget:>5.1f}s budget: {response.status_code} after {elapsed:.1f}s '
+                  f'{"; ".join(problems) or "ok"}')
+    finally:
+        render_pool.shutdown()
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""Session check: a patched editing session must equal a fresh render of its events, pixel for pixel.
+
+Opens sessions on seeded synthetic timelines, applies random recolor, relabel,
+move, add and delete patches, and after each one compares the kept image
+against a full render of the session's events. Exits non-zero on any
+differing pixel, and reports how each patch was repainted.
+Usage: python -m benchmarks.check_sessions [--events 200] [--patches 12] [--seeds 3]
+"""
+
+import sys
+import random
+import argparse
+from collections import Counter
+from datetime import date, timedelta
+
+import numpy as np
+
+from benchmarks.synthetic import COLORS, generate
+from events import EventTable
+from layout import QUALITY_MODES, normalize_render_options
+from raster import create_timeline_image
+from sessions import TimelineSession
+
+def random_patch(rng, session):
+    event_id, event = rng.choice(list(session.events.items()))
+    kind = rng.choice(('recolor', 'relabel', 'move', 'add', 'delete'))
+    if kind == 'recolor':
+        return kind, {'op': 'update', 'id': event_id, 'event': {'color': rng.choice(COLORS)}}
+    if kind == 'relabel':
+        return kind, {'op': 'update', 'id': event_id, 'event': {'event': event['event'] + ' (edited)'}}
+    if kind == 'move':
+        moved = date.fromisoformat(event['date']) + timedelta(days=rng.randint(-30, 30))
+        return kind, {'op': 'update', 'id': event_id, 'event': {'date': moved.isoformat(), 'end_date': None}}
+    if kind == 'add':
+        return kind, {'op': 'add', 'event': dict(event, event='Added ' + event['event'])}
+    return kind, {'op': 'delete', 'id': event_id}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, default=200)
+    parser.add_argument('--patches', type=int, default=12, help='patches per session')
+    parser.add_argument('--seeds', type=int, default=3)
+    parser.add_argument('--shape', default='point_heavy')
+    parser.add_argument('--quality', default='standard', choices=sorted(QUALITY_MODES))
+    args = parser.parse_args()
+
+    checked = failures = 0
+    strategies = Counter()
+    for cluster in (False, True):
+        options = normalize_render_options({'quality': args.quality, 'cluster': cluster})
+        for seed in range(args.seeds):
+            rng = random.Random(seed)
+            session = TimelineSession(generate(args.shape, args.events, seed), options)
+            for _ in range(args.patches):
+                kind, patch = random_patch(rng, session)
+                strategy = session.apply([patch])['strategy']
+                strategies[kind, strategy] += 1
+                full = create_timeline_image(EventTable.from_events(list(session.events.values())),
+                                             quality=args.quality, cluster=cluster)
+                diff = np.abs(np.asarray(full, dtype=np.int16) - np.asarray(session.image, dtype=np.int16))
+                checked += 1
+                if diff.any():
+                    failures += 1
+                    columns = np.flatnonzero(diff.max(axis=(0, 2)))
+                    print(f'cluster={cluster} seed {seed} {kind} ({strategy}): '
+                          f'{np.count_nonzero(diff.max(axis=2))} pixels differ, max {diff.max()}, '
+                          f'columns {columns.min()}-{columns.max()}')
+
+    for (kind, strategy), count in sorted(strategies.items()):
+        print(f'{kind:<8} {strategy:<10} {count}')
+    print(f'{checked} patches: {failures} mismatched')
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
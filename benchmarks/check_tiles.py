@@ -0,0 +1,78 @@
+"""Stitch check: tiles laid side by side must equal the full render, pixel for pixel.
+
+Renders seeded synthetic timelines at several zoom levels, both whole and as
+tiles, and exits non-zero on any differing pixel. Only timelines with a marker
+at a fractional position overlapping a tile edge count toward --cases, since
+those exercise the partial-canvas offsets (negative, fractional centers).
+Usage: python -m benchmarks.check_tiles [--cases 20] [--zooms 0 1 2]
+"""
+
+import sys
+import argparse
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.synthetic import generate
+from events import EventTable
+from layout import QUALITY_MODES, normalize_render_options
+from raster import finish_image, rasterize
+from sprites import MARKER_STYLES
+from tiles import TILE_SIZE, TileSet
+
+def edge_markers(layout, supersample):
+    """Markers whose sprite overlaps a tile edge and whose center is not on a whole pixel."""
+    scale_factor = layout['scale_factor']
+    found = 0
+    for item in layout['items']:
+        if item['type'] != 'marker':
+            continue
+        x = item['xy'][0]
+        radius = MARKER_STYLES[item['kind']]['glow_radius'] * scale_factor
+        edge = round(x / (TILE_SIZE * supersample)) * TILE_SIZE * supersample
+        if edge and abs(x - edge) < radius and x != int(x):
+            found += 1
+    return found
+
+def stitched(tile_set, zoom):
+    width, height = tile_set.output_size(zoom)
+    img = Image.new('RGB', (width, height))
+    for x in range(tile_set.tile_count(zoom)):
+        img.paste(tile_set.render_tile(zoom, x), (x * TILE_SIZE, 0))
+    return img
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cases', type=int, default=20, help='timelines with edge markers to check')
+    parser.add_argument('--zooms', type=int, nargs='+', default=[0, 1, 2])
+    parser.add_argument('--quality', default='standard', choices=sorted(QUALITY_MODES))
+    args = parser.parse_args()
+
+    options = normalize_render_options({'quality': args.quality})
+    supersample = QUALITY_MODES[args.quality]['supersample']
+    checked = markers = failures = 0
+    seed = 0
+    while checked < args.cases:
+        table = EventTable.from_events(generate('point_heavy', 40, seed))
+        seed += 1
+        tile_set = TileSet(table, options)
+        for zoom in args.zooms:
+            layout = tile_set.layout(zoom)
+            found = edge_markers(layout, supersample)
+            if not found:
+                continue
+            full = finish_image(rasterize(layout), tile_set.output_size(zoom), args.quality)
+            diff = np.abs(np.asarray(full, dtype=np.int16) - np.asarray(stitched(tile_set, zoom), dtype=np.int16))
+            checked += 1
+            markers += found
+            if diff.any():
+                failures += 1
+                columns = np.flatnonzero(diff.max(axis=(0, 2)))
+                print(f'seed {seed - 1} zoom {zoom}: {np.count_nonzero(diff.max(axis=2))} pixels differ, '
+                      f'max {diff.max()}, columns {columns.min()}-{columns.max()}')
+
+    print(f'{checked} renders with {markers} fractional markers on tile edges: {failures} mismatched')
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
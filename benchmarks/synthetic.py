@@ -0,0 +1,69 @@
+"""Seeded synthetic timelines for benchmarks.
+
+Each shape stresses a different part of the renderer:
+  point_heavy     mostly point events over ten years (markers, date labels)
+  duration_heavy  mostly duration events over ten years (lanes, branch curves)
+  dense_cluster   point events packed into a few short bursts (clustering, label collisions)
+  long_span       points and long durations spread over eight centuries (axis scaling)
+The same (shape, count, seed) always yields the same events.
+"""
+
+import csv
+import io
+import random
+from datetime import date, timedelta
+
+SHAPES = ('point_heavy', 'duration_heavy', 'dense_cluster', 'long_span')
+SIZES = (10, 100, 1000, 10000)
+
+COLORS = ['#007bff', '#28a745', '#dc3545', '#ffc107', '#17a2b8', '#6f42c1', '#fd7e14', '#20c997']
+WORDS = ['Launch', 'Review', 'Release', 'Planning', 'Migration', 'Audit', 'Kickoff', 'Freeze', 'Hiring', 'Offsite',
+         'Budget', 'Roadmap', 'Beta', 'Outage', 'Retrospective', 'Partnership']
+
+def _title(rng, i):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))) + f' {i}'
+
+def _event(rng, i, start, duration_days=None):
+    event = {'date': start.isoformat(), 'event': _title(rng, i)}
+    if duration_days:
+        event['end_date'] = (start + timedelta(days=duration_days)).isoformat()
+    if rng.random() < 0.8:
+        event['color'] = rng.choice(COLORS)
+    return event
+
+def generate(shape, count, seed=0):
+    """Return count event dicts of the given shape."""
+    if shape not in SHAPES:
+        raise ValueError(f'Unknown shape {shape!r}; expected one of {", ".join(SHAPES)}')
+    rng = random.Random(f'{shape}:{count}:{seed}')
+    events = []
+    if shape == 'point_heavy':
+        base = date(2015, 1, 1)
+        for i in range(count):
+            duration = rng.randint(7, 120) if rng.random() < 0.1 else None
+            events.append(_event(rng, i, base + timedelta(days=rng.randrange(3650)), duration))
+    elif shape == 'duration_heavy':
+        base = date(2015, 1, 1)
+        for i in range(count):
+            duration = rng.randint(30, 700) if rng.random() < 0.8 else None
+            events.append(_event(rng, i, base + timedelta(days=rng.randrange(3650)), duration))
+    elif shape == 'dense_cluster':
+        base = date(2020, 1, 1)
+        bursts = [base + timedelta(days=rng.randrange(1500)) for _ in range(max(1, min(5, count // 10)))]
+        for i in range(count):
+            events.append(_event(rng, i, rng.choice(bursts) + timedelta(days=rng.randrange(14))))
+    else:
+        base = date(1200, 1, 1)
+        for i in range(count):
+            duration = rng.randint(365, 36500) if rng.random() < 0.3 else None
+            events.append(_event(rng, i, base + timedelta(days=rng.randrange(800 * 365)), duration))
+    return events
+
+def to_csv(events):
+    """Serialize events as CSV bytes in the /upload_csv format."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=['date', 'event', 'end_date', 'color'], lineterminator='\n')
+    writer.writeheader()
+    for event in events:
+        writer.writerow(event)
+    return buffer.getvalue().encode('utf-8')
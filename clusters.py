@@ -0,0 +1,84 @@
+"""Level-of-detail clustering: collapse point events that share a pixel column into one marker.
+
+Point events are bucketed by x position at the current canvas width and date
+range. A bucket holding at least MIN_CLUSTER_SIZE events becomes a single
+"N events" row spanning its first to last date, so the number of markers and
+labels drawn is bounded by the canvas width rather than the event count.
+Duration events are never clustered; lanes already keep their branches apart.
+"""
+
+import numpy as np
+
+from events import EventTable, days_to_x
+
+# Bucket width in unscaled pixels: the diameter of a point marker's glow
+CLUSTER_BUCKET_WIDTH = 30
+MIN_CLUSTER_SIZE = 3
+CLUSTER_COLOR = '#6c757d'
+
+def cluster_label(count):
+    return f'{count} events'
+
+def cluster_points(table, min_day, span_days, x_start, x_end, bucket_width, min_size=MIN_CLUSTER_SIZE):
+    """Return table with dense point buckets replaced by cluster rows, or table itself if none are dense.
+
+    Cluster rows have counts > 1, their first member's date in start_days and
+    their last member's date in end_days (has_end stays False). Unclustered
+    rows keep their input order and clusters follow them; derived['source_rows']
+    maps each row back to table.
+    """
+    points = np.flatnonzero(~table.has_end)
+    if len(points) < min_size:
+        return table
+
+    point_days = table.start_days[points]
+    xs = days_to_x(point_days, min_day, span_days, x_start, x_end)
+    buckets, inverse, bucket_sizes = np.unique(((xs - x_start) // bucket_width).astype(np.int64),
+                                               return_inverse=True, return_counts=True)
+    dense = bucket_sizes[inverse] >= min_size
+    if not dense.any():
+        return table
+
+    # First/last day per bucket; only dense buckets are read back
+    member_buckets = inverse[dense]
+    member_days = point_days[dense]
+    first_days = np.full(len(buckets), np.iinfo(np.int64).max)
+    last_days = np.full(len(buckets), np.iinfo(np.int64).min)
+    np.minimum.at(first_days, member_buckets, member_days)
+    np.maximum.at(last_days, member_buckets, member_days)
+    dense_buckets = np.flatnonzero(bucket_sizes >= min_size)
+
+    keep = np.ones(len(table), dtype=bool)
+    keep[points[dense]] = False
+    kept = np.flatnonzero(keep)
+
+    palette = list(table.palette)
+    if CLUSTER_COLOR in palette:
+        cluster_color_id = palette.index(CLUSTER_COLOR)
+    else:
+        cluster_color_id = len(palette)
+        palette.append(CLUSTER_COLOR)
+
+    cluster_count = len(dense_buckets)
+    counts = np.concatenate([table.counts[kept] if table.counts is not None else np.ones(len(kept), dtype=np.int64),
+                             bucket_sizes[dense_buckets].astype(np.int64)])
+    clustered = EventTable(
+        np.concatenate([table.start_days[kept], first_days[dense_buckets]]),
+        np.concatenate([table.end_days[kept], last_days[dense_buckets]]),
+        np.concatenate([table.has_end[kept], np.zeros(cluster_count, dtype=bool)]),
+        [table.labels[i] for i in kept] + [cluster_label(int(size)) for size in bucket_sizes[dense_buckets]],
+        np.concatenate([table.color_ids[kept], np.full(cluster_count, cluster_color_id, dtype=np.int32)]),
+        palette,
+        counts=counts,
+    )
+    clustered.derived['source_rows'] = np.concatenate([kept, np.full(cluster_count, -1, dtype=np.intp)])
+    return clustered
+
+def cluster_for_canvas(table, min_day, span_days, x_start, x_end, scale_factor):
+    """Cluster table for one canvas geometry, memoized on the table so re-layouts at a zoom are free."""
+    key = (min_day, span_days, x_start, x_end, scale_factor)
+    memo = table.derived.get(('clusters', key))
+    if memo is None:
+        memo = cluster_points(table, min_day, span_days, x_start, x_end, CLUSTER_BUCKET_WIDTH * scale_factor)
+        table.derived[('clusters', key)] = memo
+    return memo
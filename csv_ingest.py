@@ -0,0 +1,178 @@
+"""Streaming CSV ingestion: rows are decoded and validated as they are read."""
+
+import io
+import csv
+import json
+
+from dates import parse_day
+from events import DEFAULT_EVENT_COLOR, EventTable, InvalidDates
+
+MAX_REPORTED_ERRORS = 100  # Errors beyond this are counted but not listed
+
+def open_text_stream(stream, encoding='utf-8'):
+    """Wrap a binary stream so it is decoded incrementally rather than read whole."""
+    # newline='' lets the csv module handle quoted newlines itself
+    return io.TextIOWrapper(stream, encoding=encoding, newline='')
+
+def validate_row(row, row_num, check_dates=True):
+    """Return (event, None) for a valid CSV row or (None, error message) for a bad one."""
+    # Required fields
+    if row.get('date') is None or row.get('event') is None:
+        return None, f'Row {row_num}: Missing required columns "date" and "event"'
+
+    event = {
+        'date': row['date'].strip(),
+        'event': row['event'].strip()
+    }
+
+    # Validate date format
+    if check_dates:
+        try:
+            parse_day(event['date'])
+        except ValueError:
+            return None, f'Row {row_num}: Invalid date format. Use YYYY-MM-DD'
+
+    # Optional fields
+    end_date = (row.get('end_date') or '').strip()
+    if end_date:
+        if check_dates:
+            try:
+                parse_day(end_date)
+            except ValueError:
+                return None, f'Row {row_num}: Invalid end_date format. Use YYYY-MM-DD'
+        event['end_date'] = end_date
+
+    color = (row.get('color') or '').strip()
+    if color:
+        if not color.startswith('#'):
+            color = '#' + color
+        if len(color) != 7:
+            return None, f'Row {row_num}: Invalid color format. Use #RRGGBB'
+        event['color'] = color
+    else:
+        event['color'] = DEFAULT_EVENT_COLOR
+
+    return event, None
+
+def iter_csv_rows(text_stream, check_dates=True):
+    """Yield (row_num, event, error) for each data row, raising ValueError on a bad header."""
+    reader = csv.DictReader(text_stream)
+    # A missing header would otherwise report every row as bad
+    if not {'date', 'event'} <= set(reader.fieldnames or ()):
+        raise ValueError('CSV header must include "date" and "event" columns')
+    for row_num, row in enumerate(reader, 1):
+        try:
+            event, error = validate_row(row, row_num, check_dates)
+        except Exception as e:
+            event, error = None, f'Row {row_num}: {str(e)}'
+        yield row_num, event, error
+
+def validate_csv(text_stream, max_errors=MAX_REPORTED_ERRORS):
+    """Validate every row without keeping events, returning (valid_count, errors, error_count).
+
+    Memory stays flat in the file size: only the first max_errors messages are kept.
+    """
+    valid_count = 0
+    errors = []
+    error_count = 0
+    for _, event, error in iter_csv_rows(text_stream):
+        if error is None:
+            valid_count += 1
+            continue
+        error_count += 1
+        if len(errors) < max_errors:
+            errors.append(error)
+    return valid_count, errors, error_count
+
+def iter_csv_events(text_stream, check_dates=True):
+    """Yield the valid events of a text stream in file order."""
+    for _, event, error in iter_csv_rows(text_stream, check_dates):
+        if error is None:
+            yield event
+
+def build_csv_table(events, row_nums, errors, error_count, max_errors=MAX_REPORTED_ERRORS):
+    """Parse the dates of rows validated with check_dates=False, returning (table, errors, error_count).
+
+    row_nums holds each event's CSV row and errors the (row_num, message) pairs
+    found so far. Each date is parsed once, as the table is built; bad ones are
+    reported against their rows with validate_row's messages. table is None
+    when any row failed.
+    """
+    try:
+        table = EventTable.from_events(events)
+    except InvalidDates as e:
+        bad = {row_nums[i]: 'end_date' for i in e.ends}
+        bad.update((row_nums[i], 'date') for i in e.starts)
+        errors = sorted(errors + [(row_num, f'Row {row_num}: Invalid {field} format. Use YYYY-MM-DD')
+                                  for row_num, field in bad.items()])[:max_errors]
+        error_count += len(bad)
+    messages = [error for _, error in errors]
+    return (None if error_count else table), messages, error_count
+
+def parse_csv_table(text_stream, max_errors=MAX_REPORTED_ERRORS):
+    """Single pass returning (EventTable, errors, error_count) for callers that render the file."""
+    events = []
+    row_nums = []
+    errors = []
+    error_count = 0
+    for row_num, event, error in iter_csv_rows(text_stream, check_dates=False):
+        if error is None:
+            events.append(event)
+            row_nums.append(row_num)
+            continue
+        error_count += 1
+        if len(errors) < max_errors:
+            errors.append((row_num, error))
+    return build_csv_table(events, row_nums, errors, error_count, max_errors)
+
+def group_csv_timelines(text_stream, max_errors=MAX_REPORTED_ERRORS):
+    """Split a multi-timeline CSV on its 'timeline' column.
+
+    Returns {name: (table, errors, error_count)} in first-seen order, as
+    build_csv_table does; bad rows only fail their own timeline. Raises
+    ValueError on a bad header.
+    """
+    reader = csv.DictReader(text_stream)
+    if not {'timeline', 'date', 'event'} <= set(reader.fieldnames or ()):
+        raise ValueError('CSV header must include "timeline", "date" and "event" columns')
+    timelines = {}
+    for row_num, row in enumerate(reader, 1):
+        name = (row.get('timeline') or '').strip()
+        events, row_nums, errors, error_count = timelines.setdefault(name, ([], [], [], [0]))
+        try:
+            event, error = validate_row(row, row_num, check_dates=False)
+        except Exception as e:
+            event, error = None, f'Row {row_num}: {str(e)}'
+        if error is None:
+            events.append(event)
+            row_nums.append(row_num)
+            continue
+        error_count[0] += 1
+        if len(errors) < max_errors:
+            errors.append((row_num, error))
+    return {name: build_csv_table(events, row_nums, errors, error_count[0], max_errors)
+            for name, (events, row_nums, errors, error_count) in timelines.items()}
+
+def error_summary(errors, error_count):
+    """One-line description of a failed upload for the 'error' response field."""
+    if error_count == 1:
+        return errors[0]
+    return f'{error_count} rows failed validation; first: {errors[0]}'
+
+def stream_events_json(text_stream, count, chunk_size=1000):
+    """Yield the upload response JSON in chunks so the event list is never built in memory.
+
+    The stream must already have passed validate_csv, so dates are not parsed again.
+    """
+    yield '{"success": true, "message": %s, "events": [' % json.dumps(f'Successfully imported {count} events')
+    chunk = []
+    first = True
+    for event in iter_csv_events(text_stream, check_dates=False):
+        chunk.append(json.dumps(event))
+        if len(chunk) >= chunk_size:
+            yield ('' if first else ',') + ','.join(chunk)
+            first = False
+            chunk = []
+    if chunk:
+        yield ('' if first else ',') + ','.join(chunk)
+    yield ']}'
@@ -0,0 +1,66 @@
+"""Fast YYYY-MM-DD parsing with exactly the acceptance rules of strptime('%Y-%m-%d').
+
+Canonical zero-padded ASCII dates take a fixed-width fast path; anything else
+(unpadded or space-padded fields, non-ASCII digits, garbage) falls back to
+strptime, so accepted and rejected inputs are identical to the old code.
+"""
+
+from datetime import date, datetime
+
+import numpy as np
+
+DATE_FORMAT = '%Y-%m-%d'
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def parse_date(text):
+    """Parse a YYYY-MM-DD string to a date, raising ValueError (or TypeError for non-strings)."""
+    if (len(text) == 10 and text[4] == '-' and text[7] == '-' and text.isascii()
+            and text[:4].isdigit() and text[5:7].isdigit() and text[8:].isdigit()):
+        # Digits are checked first: fromisoformat is stricter than strptime about padding
+        return date(int(text[:4]), int(text[5:7]), int(text[8:]))
+    return datetime.strptime(text, DATE_FORMAT).date()
+
+def parse_day(text):
+    """Parse a YYYY-MM-DD string to days since 1970-01-01."""
+    return parse_date(text).toordinal() - EPOCH_ORDINAL
+
+def parse_days(texts):
+    """Parse a sequence of date strings at once.
+
+    Returns (days, bad) where days is an int64 array of epoch days and bad is
+    the sorted list of indexes that failed to parse (their days entry is 0).
+    Well-formed rows are decoded and range-checked with array arithmetic; the
+    rest go through parse_day one by one.
+    """
+    count = len(texts)
+    days = np.zeros(count, dtype=np.int64)
+    if not count:
+        return days, []
+
+    # Only 10-character strings are eligible. The check is done in Python because
+    # numpy stringifies ints and None and drops trailing NULs.
+    shaped = np.fromiter((isinstance(text, str) and len(text) == 10 for text in texts), dtype=bool, count=count)
+    chars = np.array(texts, dtype='U10').view(np.uint32).reshape(count, 10)
+    digits = chars[:, [0, 1, 2, 3, 5, 6, 8, 9]].astype(np.int64) - ord('0')
+    shaped &= (chars[:, 4] == ord('-')) & (chars[:, 7] == ord('-')) & ((digits >= 0) & (digits <= 9)).all(axis=1)
+
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 4] * 10 + digits[:, 5]
+    day = digits[:, 6] * 10 + digits[:, 7]
+    shaped &= (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1)
+
+    idx = np.flatnonzero(shaped)
+    month_start = (year[idx] - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (month[idx] - 1)
+    month_length = ((month_start + 1).astype('datetime64[D]') - month_start.astype('datetime64[D]')).astype(np.int64)
+    in_month = day[idx] <= month_length
+    days[idx[in_month]] = month_start[in_month].astype('datetime64[D]').astype(np.int64) + day[idx[in_month]] - 1
+
+    # Out-of-range days are plain rejections; everything else unusual gets the scalar parser
+    bad = idx[~in_month].tolist()
+    for i in np.flatnonzero(~shaped).tolist():
+        try:
+            days[i] = parse_day(texts[i])
+        except (TypeError, ValueError):
+            bad.append(i)
+    bad.sort()
+    return days, bad
@@ -0,0 +1,90 @@
+"""Output encoders with per-format defaults tuned for request latency."""
+
+import io
+from PIL import Image
+
+from metrics import timed
+
+# Defaults favour encode time: zlib level 1 costs ~20% more bytes than optimize=True
+# but encodes 3-4x faster on timeline images; WebP method 0 is its fastest mode.
+OUTPUT_FORMATS = {
+    'png': {
+        'mimetype': 'image/png',
+        'pil_format': 'PNG',
+        'defaults': {'compress_level': 1, 'palette': False},
+    },
+    'webp': {
+        'mimetype': 'image/webp',
+        'pil_format': 'WEBP',
+        'defaults': {'lossless': False, 'quality': 90, 'method': 0},
+    },
+    'jpeg': {
+        'mimetype': 'image/jpeg',
+        'pil_format': 'JPEG',
+        'defaults': {'quality': 90},
+    },
+    # Vector output is serialized by svg.py rather than encoded from a raster image
+    'svg': {
+        'mimetype': 'image/svg+xml',
+        'pil_format': None,
+        'defaults': {},
+    },
+}
+FORMAT_ALIASES = {'jpg': 'jpeg'}
+
+def resolve_format(fmt):
+    """Return the canonical format name, raising ValueError for unknown formats."""
+    fmt = FORMAT_ALIASES.get(str(fmt).lower(), str(fmt).lower())
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f'Unsupported image format: {fmt}. Use one of: {", ".join(OUTPUT_FORMATS)}')
+    return fmt
+
+def normalize_encode_options(fmt, data):
+    """Merge request encoder fields over the format defaults, raising ValueError on bad input."""
+    options = dict(OUTPUT_FORMATS[fmt]['defaults'])
+    data = data or {}
+    try:
+        if 'compress_level' in options and data.get('compress_level') is not None:
+            options['compress_level'] = int(data['compress_level'])
+            if not 0 <= options['compress_level'] <= 9:
+                raise ValueError
+        if 'quality' in options and data.get('image_quality') is not None:
+            options['quality'] = int(data['image_quality'])
+            if not 1 <= options['quality'] <= 100:
+                raise ValueError
+        if 'method' in options and data.get('method') is not None:
+            options['method'] = int(data['method'])
+            if not 0 <= options['method'] <= 6:
+                raise ValueError
+    except (TypeError, ValueError):
+        raise ValueError('compress_level must be 0-9, image_quality 1-100 and method 0-6')
+
+    if 'palette' in options and data.get('palette') is not None:
+        # true means a full 256-color palette; a number picks the palette size
+        palette = data['palette']
+        try:
+            options['palette'] = 256 if palette is True else (int(palette) if palette else False)
+        except (TypeError, ValueError):
+            options['palette'] = 0
+        if palette and not 2 <= options['palette'] <= 256:
+            raise ValueError('palette must be true, false or a color count from 2 to 256')
+    if 'lossless' in options and data.get('lossless') is not None:
+        options['lossless'] = bool(data['lossless'])
+    return options
+
+@timed('encode')
+def encode_image(img, fmt='png', **options):
+    """Encode img to bytes in fmt using the format defaults overridden by options."""
+    spec = OUTPUT_FORMATS[fmt]
+    if spec['pil_format'] is None:
+        raise ValueError(f'{fmt} is not a raster format')
+    params = dict(spec['defaults'], **options)
+
+    palette = params.pop('palette', False)
+    if palette:
+        # Timelines use few flat colors, so an adaptive palette is small and fast to write
+        img = img.quantize(colors=palette, method=Image.Quantize.FASTOCTREE)
+
+    buffer = io.BytesIO()
+    img.save(buffer, format=spec['pil_format'], **params)
+    return buffer.getvalue()
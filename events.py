@@ -0,0 +1,162 @@
+"""Columnar event storage: dates parsed once into epoch-day integers held in numpy arrays."""
+
+import sys
+from datetime import date
+
+import numpy as np
+
+from dates import EPOCH_ORDINAL, parse_days
+from metrics import stage
+
+DEFAULT_EVENT_COLOR = '#dc3545'
+
+class InvalidDates(ValueError):
+    """Raised by EventTable.from_events; starts and ends are the indexes of events whose date or end_date is bad."""
+
+    def __init__(self, message, starts=(), ends=()):
+        super().__init__(message)
+        self.starts = starts
+        self.ends = ends
+
+def day_to_date(day):
+    """Convert an epoch-day integer back to a date."""
+    return date.fromordinal(int(day) + EPOCH_ORDINAL)
+
+class EventTable:
+    """Events as parallel columns in input order.
+
+    Dates are epoch-day int64 arrays (end_days is only meaningful where has_end
+    is set), labels are interned strings and colors are indexes into a palette
+    of distinct color strings, so repeated colors are stored and resolved once.
+    counts is None for plain events; clustered tables (see clusters.py) hold the
+    number of events per row there, with a cluster's last date in end_days.
+    derived memoizes values computed from the table, such as clusterings; a
+    clustered table keeps the input row of each of its rows under 'source_rows'
+    (-1 for cluster rows).
+    """
+
+    __slots__ = ('start_days', 'end_days', 'has_end', 'labels', 'color_ids', 'palette', 'counts', 'derived')
+
+    def __init__(self, start_days, end_days, has_end, labels, color_ids, palette, counts=None):
+        self.start_days = start_days
+        self.end_days = end_days
+        self.has_end = has_end
+        self.labels = labels
+        self.color_ids = color_ids
+        self.palette = palette
+        self.counts = counts
+        self.derived = {}
+
+    @classmethod
+    def from_events(cls, events):
+        """Build a table from event dicts, parsing each date once; raises ValueError on bad input."""
+        count = len(events)
+        end_days = np.zeros(count, dtype=np.int64)
+        has_end = np.zeros(count, dtype=bool)
+        color_ids = np.empty(count, dtype=np.int32)
+        start_texts = []
+        end_texts = []
+        end_rows = []
+        labels = []
+        palette = []
+        palette_index = {}
+
+        for i, event in enumerate(events):
+            if 'date' not in event or 'event' not in event:
+                raise ValueError('Each event must have date and event fields')
+            start_texts.append(event['date'])
+            if event.get('end_date'):
+                end_texts.append(event['end_date'])
+                end_rows.append(i)
+
+            labels.append(sys.intern(str(event['event'])))
+            color = event.get('color', DEFAULT_EVENT_COLOR)
+            color_id = palette_index.get(color)
+            if color_id is None:
+                color_id = palette_index[color] = len(palette)
+                palette.append(color)
+            color_ids[i] = color_id
+
+        # Parse each date column in one batch
+        with stage('parse_dates'):
+            start_days, bad_starts = parse_days(start_texts)
+            parsed_ends, bad_ends = parse_days(end_texts)
+        if bad_starts or bad_ends:
+            raise InvalidDates('Invalid date format. Use YYYY-MM-DD', bad_starts, [end_rows[i] for i in bad_ends])
+        end_days[end_rows] = parsed_ends
+        has_end[end_rows] = True
+
+        return cls(start_days, end_days, has_end, labels, color_ids, palette)
+
+    @classmethod
+    def concat(cls, tables):
+        """Rows of several tables one after another, with their palettes merged."""
+        palette = []
+        palette_index = {}
+        color_ids = []
+        for table in tables:
+            remap = np.empty(len(table.palette), dtype=np.int32)
+            for j, color in enumerate(table.palette):
+                color_id = palette_index.get(color)
+                if color_id is None:
+                    color_id = palette_index[color] = len(palette)
+                    palette.append(color)
+                remap[j] = color_id
+            color_ids.append(remap[table.color_ids])
+        counts = None
+        if any(table.counts is not None for table in tables):
+            counts = np.concatenate([table.counts if table.counts is not None else np.ones(len(table), dtype=np.int64)
+                                     for table in tables])
+        return cls(np.concatenate([table.start_days for table in tables]),
+                   np.concatenate([table.end_days for table in tables]),
+                   np.concatenate([table.has_end for table in tables]),
+                   [label for table in tables for label in table.labels],
+                   np.concatenate(color_ids), palette, counts)
+
+    def take(self, rows):
+        """Table of the given rows, in that order, sharing this table's palette."""
+        rows = np.asarray(rows, dtype=np.intp)
+        return EventTable(self.start_days[rows], self.end_days[rows], self.has_end[rows],
+                          [self.labels[i] for i in rows], self.color_ids[rows], self.palette,
+                          None if self.counts is None else self.counts[rows])
+
+    @classmethod
+    def coerce(cls, events):
+        """Return events unchanged if already a table, otherwise parse them into one."""
+        return events if isinstance(events, cls) else cls.from_events(events)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def color(self, i):
+        return self.palette[self.color_ids[i]]
+
+    def sort_order(self):
+        """Indexes in start-date order; ties keep input order like a stable list sort."""
+        return np.argsort(self.start_days, kind='stable')
+
+    def day_range(self):
+        """Return (min_day, span_days) over all start and end dates, with span at least 1."""
+        min_day = int(self.start_days.min())
+        max_day = int(self.start_days.max())
+        if self.has_end.any():
+            ends = self.end_days[self.has_end]
+            min_day = min(min_day, int(ends.min()))
+            max_day = max(max_day, int(ends.max()))
+        return min_day, max(1, max_day - min_day)
+
+    def to_dicts(self):
+        """Canonical event dicts (ISO dates) in input order, e.g. for cache keys."""
+        records = []
+        for i, label in enumerate(self.labels):
+            record = {'date': day_to_date(self.start_days[i]).isoformat(), 'event': label, 'color': self.color(i)}
+            if self.has_end[i]:
+                record['end_date'] = day_to_date(self.end_days[i]).isoformat()
+            records.append(record)
+        return records
+
+def days_to_x(days, min_day, span_days, x_start, x_end):
+    """Map epoch days linearly onto [x_start, x_end] as float64 pixel positions."""
+    # Scale both sides to seconds so results match the old timedelta.total_seconds() math bit for bit
+    progress = (np.asarray(days, dtype=np.int64) - min_day) * 86400.0 / (span_days * 86400.0)
+    return x_start + progress * (x_end - x_start)
@@ -0,0 +1,125 @@
+"""Process-wide font registry so TrueType files are resolved and parsed once."""
+
+import os
+import threading
+import logging
+from PIL import ImageFont
+
+from lru import LRUCache
+from metrics import timed
+
+logger = logging.getLogger(__name__)
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fonts')
+
+# Bundled font files, tried first, per (family, weight)
+LOCAL_FONT_FILES = {
+    ('sans', 'regular'): ['DejaVuSans.ttf', 'LiberationSans-Regular.ttf', 'OpenSans-Regular.ttf', 'arial.ttf'],
+    ('sans', 'bold'): ['DejaVuSans-Bold.ttf', 'LiberationSans-Bold.ttf', 'OpenSans-Bold.ttf', 'arialbd.ttf'],
+}
+
+# System fonts, tried when nothing is bundled
+SYSTEM_FONT_FILES = {
+    ('sans', 'regular'): [
+        # Windows fonts
+        "arial.ttf",
+        "C:/Windows/Fonts/arial.ttf",
+        "C:/Windows/Fonts/calibri.ttf",
+        # Linux/Unix fonts
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+        "/usr/share/fonts/TTF/DejaVuSans.ttf",
+        "/System/Library/Fonts/Arial.ttf",  # macOS
+        "/usr/share/fonts/truetype/opensans/OpenSans-Regular.ttf",
+        "/usr/share/fonts/google-noto/NotoSans-Regular.ttf",
+        "/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf",
+        "/usr/share/fonts/truetype/ubuntu-font-family/Ubuntu-R.ttf",
+        # Generic fallbacks
+        "DejaVuSans.ttf",
+        "LiberationSans-Regular.ttf",
+        "OpenSans-Regular.ttf",
+        "Ubuntu-R.ttf",
+    ],
+    ('sans', 'bold'): [
+        "arialbd.ttf",
+        "C:/Windows/Fonts/arialbd.ttf",
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+        "/usr/share/fonts/TTF/DejaVuSans-Bold.ttf",
+        "DejaVuSans-Bold.ttf",
+        "LiberationSans-Bold.ttf",
+    ],
+}
+
+class FontRegistry:
+    """Resolves font files once and keeps loaded fonts keyed by (family, size, weight)."""
+
+    def __init__(self, max_fonts=64):
+        self._paths = {}
+        self._path_lock = threading.Lock()
+        self._fonts = LRUCache(max_entries=max_fonts)
+
+    def resolve_path(self, family='sans', weight='regular'):
+        """Return the first loadable font file for family/weight, or None."""
+        key = (family, weight)
+        with self._path_lock:
+            if key not in self._paths:
+                self._paths[key] = self._find_path(family, weight)
+            return self._paths[key]
+
+    def get(self, size, family='sans', weight='regular'):
+        """Return a font of the given pixel size, loading it on first use."""
+        key = (family, int(size), weight)
+        return self._fonts.get_or_create(key, lambda: self._load(family, int(size), weight))
+
+    def preload(self, sizes, family='sans', weight='regular'):
+        """Load every size up front so the first render does not pay for it."""
+        for size in sizes:
+            self.get(size, family, weight)
+        logger.info(f"Preloaded {len(sizes)} font sizes for {family}/{weight}")
+
+    def stats(self):
+        stats = self._fonts.stats()
+        stats['paths'] = {f'{family}/{weight}': path for (family, weight), path in self._paths.items()}
+        return stats
+
+    @timed('font_load')
+    def _load(self, family, size, weight):
+        path = self.resolve_path(family, weight)
+        if path is None and weight != 'regular':
+            path = self.resolve_path(family, 'regular')
+        if path is not None:
+            try:
+                return ImageFont.truetype(path, size)
+            except (OSError, IOError) as e:
+                logger.warning(f"Failed to load font {path} at size {size}: {e}")
+        logger.warning("No TrueType fonts found, falling back to default font")
+        return ImageFont.load_default()
+
+    def _find_path(self, family, weight):
+        candidates = [os.path.join(FONTS_DIR, name) for name in LOCAL_FONT_FILES.get((family, weight), [])]
+        for font_path in candidates:
+            if os.path.exists(font_path) and _can_load(font_path):
+                logger.info(f"Using local font for {family}/{weight}: {font_path}")
+                return font_path
+
+        for font_path in SYSTEM_FONT_FILES.get((family, weight), []):
+            if _can_load(font_path):
+                logger.info(f"Using system font for {family}/{weight}: {font_path}")
+                return font_path
+
+        logger.warning(f"No TrueType font found for {family}/{weight}")
+        return None
+
+def _can_load(font_path):
+    try:
+        ImageFont.truetype(font_path, 12)
+        return True
+    except (OSError, IOError):
+        return False
+
+font_registry = FontRegistry()
+
+def get_font(size, family='sans', weight='regular'):
+    """Return a cached TrueType font of the given pixel size."""
+    return font_registry.get(size, family, weight)
@@ -0,0 +1,39 @@
+"""Gunicorn settings for production: one threaded web worker in front of warm, recycled render workers.
+
+Usage: gunicorn -c gunicorn.conf.py app:app
+
+The web process keeps jobs, tile sets and editing sessions in memory, so there
+is exactly one gunicorn worker, serving requests on a thread pool; rendering
+happens in the render pool. That pool uses a forkserver that imports warmup.py
+once, so render workers fork with fonts, sprites and encoder plugins already
+loaded and shared copy-on-write, and each worker is replaced after
+TIMELINE_RENDER_MAX_RENDERS renders. The app is imported once in the gunicorn
+master (preload_app), so a replaced web worker starts without importing it again. Warm-up
+starts as soon as the web worker boots; /ready answers 503 until the web
+process and the render workers are warm. SIGTERM stops accepting connections,
+finishes open requests within graceful_timeout, then stops the render workers.
+"""
+
+import os
+
+# Production defaults; explicit environment settings win. Set before the app is imported.
+os.environ.setdefault('TIMELINE_RENDER_START_METHOD', 'forkserver')
+os.environ.setdefault('TIMELINE_RENDER_MAX_RENDERS', '500')
+
+bind = f"{os.environ.get('TIMELINE_HOST', '0.0.0.0')}:{os.environ.get('TIMELINE_PORT', 5000)}"
+workers = 1  # Jobs, tile sets and sessions live in this one process
+worker_class = 'gthread'
+threads = int(os.environ.get('TIMELINE_WEB_THREADS', 32))
+preload_app = True
+graceful_timeout = 30
+accesslog = '-'
+
+def post_worker_init(worker):
+    # Warm up in the background right away instead of on the first request
+    from app import start_warm_up
+    start_warm_up()
+
+def worker_exit(server, worker):
+    from app import render_pool
+    if render_pool is not None:
+        render_pool.shutdown()
@@ -0,0 +1,201 @@
+"""In-process job queue for renders that should not hold an HTTP connection open.
+
+A request enqueues a render and gets a job id back immediately; dispatcher
+threads pull jobs off a bounded local queue and run them (through the render
+pool when one is configured), and finished results are kept for a TTL in an
+LRU bounded by bytes, so a burst of large renders evicts the least recently
+used results early. No external broker is involved, so jobs do not survive a
+restart.
+"""
+
+import time
+import uuid
+import queue
+import logging
+import threading
+
+from lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Coarse progress reported per status; the render itself runs in another process
+JOB_PROGRESS = {'queued': 0.0, 'running': 0.5, 'done': 1.0, 'failed': 1.0}
+
+class JobQueueFull(Exception):
+    """The pending-job queue is at capacity."""
+
+class Job:
+    """One queued render and, once finished, its encoded bytes or error."""
+
+    __slots__ = ('id', 'key', 'fmt', 'status', 'result', 'error', 'error_status',
+                 'created', 'started', 'finished', '_run')
+
+    def __init__(self, key, fmt, run):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.fmt = fmt
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.error_status = None
+        self.created = time.monotonic()
+        self.started = None
+        self.finished = None
+        self._run = run
+
+    def to_dict(self, position=None):
+        info = {'job_id': self.id, 'status': self.status, 'progress': JOB_PROGRESS[self.status], 'format': self.fmt}
+        if position is not None:
+            info['position'] = position
+        if self.started is not None:
+            info['elapsed'] = round((self.finished or time.monotonic()) - self.started, 3)
+        if self.status == 'failed':
+            info['error'] = self.error
+        return info
+
+def _job_size(job):
+    return len(job.result or b'') + len(job.error or '')
+
+class JobQueue:
+    """Bounded FIFO of render jobs served by dispatcher threads, with results kept for ttl seconds.
+
+    Finished jobs hold at most max_result_bytes of results (None for no limit);
+    past that the least recently used are dropped before their TTL. run callables may raise one of retry_on (e.g. a saturated render pool) to be
+    retried after retry_delay; error_status(exc) maps other failures to an HTTP
+    status that the result endpoint reports.
+    """
+
+    def __init__(self, workers=1, max_pending=100, ttl=600.0, retry_on=(), retry_delay=0.25, error_status=None,
+                 max_result_bytes=None):
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self.retry_on = tuple(retry_on)
+        self.retry_delay = retry_delay
+        self._error_status = error_status or (lambda e: 500)
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._jobs = {}  # Queued and running jobs
+        self._finished = LRUCache(max_bytes=max_result_bytes, sizeof=_job_size)
+        self._order = []  # Queued job ids, for position reporting
+        self._lock = threading.Lock()
+        self._threads = []
+        self.completed = 0
+        self.failed = 0
+        self.expired = 0
+        self.rejected = 0
+
+    def submit(self, key, fmt, run):
+        """Enqueue run() and return its Job, raising JobQueueFull when the queue is at capacity."""
+        self._ensure_started()
+        self._expire()
+        job = Job(key, fmt, run)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._order.append(job.id)
+        try:
+            self._pending.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+                self._order.remove(job.id)
+                self.rejected += 1
+            raise JobQueueFull('Job queue is full; retry shortly')
+        return job
+
+    def add_finished(self, key, fmt, result):
+        """Record an already-available result (e.g. a render cache hit) as a done job."""
+        self._expire()
+        job = Job(key, fmt, None)
+        job.started = job.finished = job.created
+        job.status = 'done'
+        job.result = result
+        with self._lock:
+            self._finished.put(job.id, job)
+        return job
+
+    def get(self, job_id):
+        """Return the Job for job_id, or None if it is unknown or has expired."""
+        self._expire()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job if job is not None else self._finished.get(job_id)
+
+    def describe(self, job):
+        """Status dict for job, including its queue position while it waits."""
+        with self._lock:
+            position = self._order.index(job.id) if job.status == 'queued' and job.id in self._order else None
+        return job.to_dict(position)
+
+    def stats(self):
+        with self._lock:
+            statuses = [job.status for job in self._jobs.values()]
+            return {
+                'queued': statuses.count('queued'),
+                'running': statuses.count('running'),
+                'stored': len(self._finished),
+                'stored_bytes': self._finished.bytes,
+                'completed': self.completed,
+                'failed': self.failed,
+                'expired': self.expired,
+                'evicted': self._finished.evictions,
+                'rejected': self.rejected,
+            }
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._dispatch, name=f'render-job-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _dispatch(self):
+        while True:
+            job = self._pending.get()
+            with self._lock:
+                self._order.remove(job.id)
+                job.status = 'running'
+                job.started = time.monotonic()
+            try:
+                result = self._run_with_retry(job._run)
+            except Exception as e:
+                logger.warning(f"Render job {job.id} failed: {e}")
+                with self._lock:
+                    job.status = 'failed'
+                    job.error = str(e)
+                    job.error_status = self._error_status(e)
+                    job.finished = time.monotonic()
+                    self.failed += 1
+                    self._store(job)
+            else:
+                with self._lock:
+                    job.status = 'done'
+                    job.result = result
+                    job.finished = time.monotonic()
+                    self.completed += 1
+                    self._store(job)
+            finally:
+                job._run = None
+                self._pending.task_done()
+
+    def _store(self, job):
+        """Move a finished job into the byte-bounded result store; the caller holds _lock."""
+        del self._jobs[job.id]
+        self._finished.put(job.id, job)
+
+    def _run_with_retry(self, run):
+        while True:
+            try:
+                return run()
+            except self.retry_on:
+                time.sleep(self.retry_delay)
+
+    def _expire(self):
+        """Drop finished jobs older than the TTL."""
+        cutoff = time.monotonic() - self.ttl
+        with self._lock:
+            stale = [job_id for job_id, job in self._finished.items() if job.finished < cutoff]
+            for job_id in stale:
+                self._finished.pop(job_id)
+            self.expired += len(stale)
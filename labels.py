@@ -0,0 +1,109 @@
+"""Label placement backed by a uniform grid so collision checks only touch nearby labels."""
+
+import math
+from collections import defaultdict
+
+from metrics import timed
+
+# Date labels collide when closer than (width sum / 2 + margin) horizontally and 25px vertically
+DATE_LABEL_MARGIN = 15
+DATE_LABEL_HALF_HEIGHT = 12.5
+
+class LabelIndex:
+    """Uniform grid of axis-aligned boxes (x0, y0, x1, y1) bucketed by cell."""
+
+    def __init__(self, cell_width=200.0, cell_height=50.0):
+        self.cell_width = float(cell_width)
+        self.cell_height = float(cell_height)
+        self._cells = defaultdict(list)
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def insert(self, box, kind='date'):
+        """Add a box; kind lets queries restrict which labels they collide with."""
+        entry = (float(box[0]), float(box[1]), float(box[2]), float(box[3]), kind)
+        for cell in self._cells_for(entry):
+            self._cells[cell].append(entry)
+        self._count += 1
+
+    def collides(self, box, kinds=None):
+        """Return True if box strictly overlaps any stored box (of the given kinds)."""
+        x0, y0, x1, y1 = box
+        for cell in self._cells_for(box):
+            for ex0, ey0, ex1, ey1, kind in self._cells.get(cell, ()):
+                if x0 < ex1 and ex0 < x1 and y0 < ey1 and ey0 < y1 and (kinds is None or kind in kinds):
+                    return True
+        return False
+
+    def add_date_label(self, x, y, width):
+        """Record a date label centered on x with its top at y."""
+        self.insert(_date_label_box(x, y, width, 0), 'date')
+
+    def _cells_for(self, box):
+        cx0 = math.floor(box[0] / self.cell_width)
+        cx1 = math.floor(box[2] / self.cell_width)
+        cy0 = math.floor(box[1] / self.cell_height)
+        cy1 = math.floor(box[3] / self.cell_height)
+        return [(cx, cy) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)]
+
+def _date_label_box(x, y, width, margin):
+    half_width = width / 2 + margin
+    return (x - half_width, y - DATE_LABEL_HALF_HEIGHT, x + half_width, y + DATE_LABEL_HALF_HEIGHT)
+
+@timed('label_placement')
+def get_optimal_date_position(x_pos, timeline_y, label_index, text_width, is_duration=False):
+    """Calculate optimal position for date text to avoid overlaps."""
+    x_pos = float(x_pos)
+    timeline_y = float(timeline_y)
+    text_width = float(text_width)
+
+    base_y = timeline_y + 25  # Default position below timeline
+    alternative_y = timeline_y - 45  # Alternative position above timeline
+
+    def check_overlap(x, y, width):
+        return label_index.collides(_date_label_box(x, y, width, DATE_LABEL_MARGIN))
+
+    # Try default position first
+    if not check_overlap(x_pos, base_y, text_width):
+        return base_y, False
+
+    # Try alternative position above timeline
+    if not check_overlap(x_pos, alternative_y, text_width):
+        return alternative_y, True
+
+    # If both positions conflict, find an available offset
+    for offset in range(25, 120, 25):
+        # Try below with offset
+        test_y = base_y + offset
+        if not check_overlap(x_pos, test_y, text_width):
+            return test_y, False
+
+        # Try above with offset
+        test_y = alternative_y - offset
+        if not check_overlap(x_pos, test_y, text_width):
+            return test_y, True
+
+    # Fallback: use default position
+    return base_y, False
+
+@timed('label_placement')
+def place_title_box(label_index, box, direction, step, min_y, max_y, max_steps=4):
+    """Shift an event-title box away from the timeline until it clears other titles.
+
+    Returns the vertical offset to apply; the box is recorded in the index at
+    its final position. If no free slot fits on the canvas the box stays put.
+    """
+    x0, y0, x1, y1 = box
+    offset = 0
+    for attempt in range(max_steps + 1):
+        dy = direction * step * attempt
+        candidate = (x0, y0 + dy, x1, y1 + dy)
+        if candidate[1] < min_y or candidate[3] > max_y:
+            break
+        if not label_index.collides(candidate, kinds=('title',)):
+            offset = dy
+            break
+    label_index.insert((x0, y0 + offset, x1, y1 + offset), 'title')
+    return offset
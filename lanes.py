@@ -0,0 +1,46 @@
+"""Lane assignment for duration branches (greedy interval-graph coloring)."""
+
+import heapq
+
+def assign_lanes(intervals, sides=None, gap=0.0, max_lanes=None):
+    """Return a lane index per (start, end) interval, reusing lanes once they end.
+
+    Intervals are swept in start order. Each side keeps a min-heap of busy lanes
+    keyed by end position and a min-heap of freed lane ids, so the lowest free
+    lane is reused and the whole pass is O(n log n). A lane is free for an
+    interval when its previous occupant ended at least ``gap`` before the new
+    start. With ``max_lanes`` set, a full side reuses the lane that ends first
+    rather than growing off the canvas.
+    """
+    if sides is None:
+        sides = [0] * len(intervals)
+
+    lanes = [0] * len(intervals)
+    busy = {}  # side -> heap of (end, lane)
+    free = {}  # side -> heap of lane ids
+    next_lane = {}
+
+    order = sorted(range(len(intervals)), key=lambda i: intervals[i][0])
+    for i in order:
+        start, end = intervals[i]
+        side = sides[i]
+        side_busy = busy.setdefault(side, [])
+        side_free = free.setdefault(side, [])
+
+        # Release every lane whose occupant ended before this interval starts
+        while side_busy and side_busy[0][0] + gap <= start:
+            heapq.heappush(side_free, heapq.heappop(side_busy)[1])
+
+        if side_free:
+            lane = heapq.heappop(side_free)
+        elif max_lanes is None or next_lane.get(side, 0) < max_lanes:
+            lane = next_lane.get(side, 0)
+            next_lane[side] = lane + 1
+        else:
+            # Side is full: share the lane that frees up soonest
+            lane = heapq.heappop(side_busy)[1]
+
+        lanes[i] = lane
+        heapq.heappush(side_busy, (max(end, start), lane))
+
+    return lanes
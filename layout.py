@@ -0,0 +1,419 @@
+"""Backend-independent timeline layout: positions, branch geometry and labels as a display list.
+
+compute_layout turns events into a list of drawing primitives (dicts with a
+'type' key) in paint order. The Pillow backend (raster.py) and the SVG backend
+(svg.py) both consume the same layout, so geometry is computed in one place.
+
+layout['item_rows'] holds the input event row each item was drawn for (-1 for
+the axis, the title and clusters), so editing sessions can restyle one event's
+items in place.
+"""
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from clusters import cluster_for_canvas
+from curves import branch_points, curve_points
+from events import EventTable, day_to_date, days_to_x
+from fonts import font_registry, get_font
+from labels import LabelIndex, get_optimal_date_position, place_title_box
+from lanes import assign_lanes
+from metrics import timed
+from sprites import MARKER_STYLES
+from text_cache import text_metrics
+
+# Base font sizes used by the renderer (title, large, medium, small)
+RENDER_FONT_SIZES = (28, 24, 20, 16)
+
+# Render presets: supersampling factor, softening blur and default output scale
+QUALITY_MODES = {
+    'draft': {'supersample': 1, 'smooth': False, 'scale': 1},
+    'standard': {'supersample': 2, 'smooth': True, 'scale': 1},
+    'print': {'supersample': 2, 'smooth': True, 'scale': 2},
+}
+DEFAULT_CANVAS_SIZE = (2000, 1000)
+MIN_CANVAS_SIZE = (400, 300)
+MAX_CANVAS_SIZE = (8000, 4000)
+MAX_SCALE = 4
+MAX_RENDER_PIXELS = 8000 * 4000  # Supersampled canvas limit
+
+# Text is measured on a scratch surface; textbbox does not depend on the image
+_measure_draw = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+
+def hex_to_rgb(hex_color):
+    """Convert hex color to RGB tuple."""
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+def format_date_readable(date_obj):
+    """Format date as DD Month YYYY for better readability."""
+    return date_obj.strftime('%d %B %Y')
+
+def get_text_dimensions(draw, text, font):
+    """Safely get text dimensions with fallbacks for different font types."""
+    text = str(text)  # Ensure string
+    try:
+        # Try the modern textbbox method first
+        bbox = draw.textbbox((0, 0), text, font=font)
+        width = float(bbox[2] - bbox[0])
+        height = float(bbox[3] - bbox[1])
+        return width, height
+    except (AttributeError, TypeError):
+        try:
+            # Fallback to older textsize method
+            width, height = draw.textsize(text, font=font)
+            return float(width), float(height)
+        except (AttributeError, TypeError):
+            # Last resort: estimate based on character count and scale factor
+            if hasattr(font, 'size'):
+                char_width = font.size * 0.6
+                char_height = font.size * 1.2
+            else:
+                # Very basic fallback
+                char_width = 12
+                char_height = 16
+            return float(len(text) * char_width), float(char_height)
+
+def measure_text(text, font_size, fallback_char_width):
+    """Return the rendered width of text (cached per font and string), estimating from its length if measuring fails."""
+    try:
+        return text_metrics.measure(str(text), font_size)[0]
+    except Exception:
+        try:
+            return float(get_text_dimensions(_measure_draw, text, get_font(font_size))[0])
+        except Exception:
+            return float(len(text) * fallback_char_width)
+
+def preload_fonts():
+    """Load the font sizes used by each quality mode ahead of the first request."""
+    scale_factors = sorted({mode['supersample'] * mode['scale'] for mode in QUALITY_MODES.values()})
+    font_registry.preload([size * scale_factor for scale_factor in scale_factors for size in RENDER_FONT_SIZES])
+
+def normalize_render_options(data):
+    """Validate quality/scale/width/height request fields, raising ValueError on bad input."""
+    quality = data.get('quality') or 'standard'
+    if quality not in QUALITY_MODES:
+        raise ValueError(f'Invalid quality. Use one of: {", ".join(QUALITY_MODES)}')
+
+    try:
+        scale = float(data.get('scale') or QUALITY_MODES[quality]['scale'])
+        width = int(data.get('width') or DEFAULT_CANVAS_SIZE[0])
+        height = int(data.get('height') or DEFAULT_CANVAS_SIZE[1])
+    except (TypeError, ValueError):
+        raise ValueError('scale, width and height must be numbers')
+
+    if not 0 < scale <= MAX_SCALE:
+        raise ValueError(f'scale must be greater than 0 and at most {MAX_SCALE}')
+    if not (MIN_CANVAS_SIZE[0] <= width <= MAX_CANVAS_SIZE[0] and MIN_CANVAS_SIZE[1] <= height <= MAX_CANVAS_SIZE[1]):
+        raise ValueError(f'width must be {MIN_CANVAS_SIZE[0]}-{MAX_CANVAS_SIZE[0]} '
+                         f'and height {MIN_CANVAS_SIZE[1]}-{MAX_CANVAS_SIZE[1]}')
+
+    scale_factor = scale * QUALITY_MODES[quality]['supersample']
+    if width * height * scale_factor * scale_factor > MAX_RENDER_PIXELS:
+        raise ValueError('Requested size is too large; lower scale, width or height')
+
+    # Clustering is on unless the request turns it off explicitly
+    cluster = data.get('cluster', True) not in (False, 'false', '0', 0)
+
+    return {'quality': quality, 'scale': scale, 'width': width, 'height': height, 'cluster': cluster}
+
+def output_geometry(quality='standard', scale=None, width=None, height=None, supersample=None):
+    """Return (output_size, canvas_size, scale_factor) for the given render options."""
+    mode = QUALITY_MODES[quality]
+    scale = scale or mode['scale']
+    supersample = mode['supersample'] if supersample is None else supersample
+    output_size = (int((width or DEFAULT_CANVAS_SIZE[0]) * scale), int((height or DEFAULT_CANVAS_SIZE[1]) * scale))
+    canvas_size = (output_size[0] * supersample, output_size[1] * supersample)
+    return output_size, canvas_size, scale * supersample
+
+@timed('layout')
+def compute_layout(events, canvas_size, scale_factor, cluster=True):
+    """Lay out events (dicts or an EventTable) on a canvas of canvas_size pixels, returning a display list.
+
+    With cluster set, dense runs of point events collapse into "N events" markers (see clusters.py).
+    """
+    width, height = canvas_size
+    margin = 150 * scale_factor
+    timeline_y = height // 2
+    items = []
+
+    table = EventTable.coerce(events)
+
+    # Draw main timeline with elegant styling
+    timeline_start = margin
+    timeline_end = width - margin
+    timeline_width = 6 * scale_factor
+
+    # Draw main timeline with gradient effect
+    for i in range(int(timeline_width)):
+        gray_value = int(50 + i * 10)
+        items.append({'type': 'line', 'points': [(timeline_start, timeline_y - i), (timeline_end, timeline_y - i)],
+                      'color': (gray_value, gray_value, gray_value), 'width': 1})
+
+    # Add elegant rounded caps to timeline
+    cap_radius = int(4 * scale_factor)
+    for cap_x in (timeline_start, timeline_end):
+        items.append({'type': 'ellipse', 'box': [cap_x - cap_radius, timeline_y - cap_radius,
+                                                 cap_x + cap_radius, timeline_y + cap_radius], 'fill': 'black'})
+
+    # Calculate time range and map every date to x in one pass, in start-date order
+    min_day, span_days = table.day_range()
+    duration_events = int(table.has_end.sum())
+    point_events = len(table) - duration_events
+    source_rows = None
+    if cluster:
+        # Clusters keep the full table's date range so nothing rescales
+        table = cluster_for_canvas(table, min_day, span_days, timeline_start, timeline_end, scale_factor)
+        source_rows = table.derived.get('source_rows')
+    order = table.sort_order()
+    rows = (order if source_rows is None else source_rows[order]).tolist()
+    counts = table.counts[order].tolist() if table.counts is not None else [1] * len(table)
+    start_days = table.start_days[order]
+    start_xs = days_to_x(start_days, min_day, span_days, timeline_start, timeline_end).tolist()
+    end_xs = days_to_x(table.end_days[order], min_day, span_days, timeline_start, timeline_end).tolist()
+    has_end = table.has_end[order].tolist()
+    labels = [table.labels[j] for j in order]
+    palette_rgb = [hex_to_rgb(color) for color in table.palette]
+    colors = [palette_rgb[color_id] for color_id in table.color_ids[order]]
+
+    font_large = 24 * scale_factor
+    font_medium = 20 * scale_factor
+    font_small = 16 * scale_factor
+    font_title = 28 * scale_factor
+
+    # Track positions to avoid overlaps
+    label_index = LabelIndex(cell_width=100 * scale_factor, cell_height=25 * scale_factor)
+    title_top = 80 * scale_factor  # Keep event titles clear of the chart title
+
+    # Lay out duration branches first: each branch and its centered title
+    # occupy an x extent, and lanes are reused once the previous occupant ends
+    branch_height = 80 * scale_factor
+    lane_spacing = 60 * scale_factor
+    duration_indices = [i for i, is_duration in enumerate(has_end) if is_duration]
+    duration_text_widths = {}
+    extents = []
+    for i in duration_indices:
+        start_x = start_xs[i]
+        end_x = end_xs[i]
+        text_width = measure_text(labels[i], font_medium, 12 * scale_factor)
+        duration_text_widths[i] = text_width
+        half_title = text_width / 2.0 + 8 * scale_factor
+        mid_x = (start_x + end_x) / 2.0
+        extents.append((min(start_x, mid_x - half_title), max(end_x, mid_x + half_title)))
+
+    max_lanes = max(1, int((timeline_y - title_top - branch_height - 40 * scale_factor) // lane_spacing) + 1)
+    duration_lanes = dict(zip(duration_indices, assign_lanes(
+        extents, sides=[i % 2 for i in duration_indices], gap=20 * scale_factor, max_lanes=max_lanes)))
+
+    # Input row each item was drawn for (-1 for the axis, title and clusters), so edits can find an event's items
+    item_rows = [-1] * len(items)
+    for i in range(len(labels)):
+        color = colors[i]
+        start_x = start_xs[i]
+        start_date = day_to_date(start_days[i])
+
+        if has_end[i]:
+            # Duration event with flowing curves
+            end_x = end_xs[i]
+
+            # Alternate sides and stack in the assigned lane
+            is_above = i % 2 == 0
+            direction = -1 if is_above else 1
+
+            branch_y = timeline_y + direction * (branch_height + duration_lanes[i] * lane_spacing)
+
+            # The beautiful flowing branch
+            points, joints = branch_points(start_x, timeline_y, branch_y, end_x)
+            items.append({'type': 'polyline', 'points': points, 'color': color, 'width': int(6 * scale_factor),
+                          'joints': joints})
+
+            # Elegant start and end markers with soft glow
+            items.append({'type': 'marker', 'xy': (start_x, timeline_y), 'color': color, 'kind': 'duration'})
+            items.append({'type': 'marker', 'xy': (end_x, timeline_y), 'color': color, 'kind': 'duration'})
+
+            # Event text with elegant styling
+            event_text = labels[i]
+            text_width = duration_text_widths[i]
+
+            text_x = float(start_x + end_x) / 2.0 - text_width / 2.0
+
+            if is_above:
+                text_y = float(branch_y - 35 * scale_factor)
+            else:
+                text_y = float(branch_y + 15 * scale_factor)
+
+            # Elegant text background with soft shadow
+            padding = int(8 * scale_factor)
+            shadow_offset = int(3 * scale_factor)
+
+            # Nudge the title outward if it would cover another event title
+            text_y += place_title_box(label_index, (
+                text_x - padding, text_y - 3 * scale_factor,
+                text_x + text_width + padding + shadow_offset, text_y + 25 * scale_factor + shadow_offset
+            ), direction, 36 * scale_factor, title_top, height, max_steps=2)
+
+            # Drop shadow
+            items.append({'type': 'rect', 'box': [
+                int(text_x - padding + shadow_offset), int(text_y - 3 * scale_factor + shadow_offset),
+                int(text_x + text_width + padding + shadow_offset), int(text_y + 25 * scale_factor + shadow_offset)
+            ], 'fill': (200, 200, 200)})
+
+            # Main background
+            items.append({'type': 'rect', 'box': [
+                int(text_x - padding), int(text_y - 3 * scale_factor),
+                int(text_x + text_width + padding), int(text_y + 25 * scale_factor)
+            ], 'fill': 'white', 'outline': color, 'width': int(2 * scale_factor)})
+
+            items.append({'type': 'text', 'xy': (int(text_x), int(text_y)), 'text': event_text,
+                          'fill': color, 'font_size': font_medium, 'text_width': text_width})
+
+            # Smart date positioning with new format
+            start_date_text = format_date_readable(start_date)
+            end_date_text = format_date_readable(day_to_date(table.end_days[order[i]]))
+            start_width = measure_text(start_date_text, font_small, 10 * scale_factor)
+            end_width = measure_text(end_date_text, font_small, 10 * scale_factor)
+
+            # Calculate optimal positions
+            start_date_y, start_above = get_optimal_date_position(
+                start_x, timeline_y, label_index, start_width, True)
+            label_index.add_date_label(start_x, start_date_y, start_width)
+
+            end_date_y, end_above = get_optimal_date_position(
+                end_x, timeline_y, label_index, end_width, True)
+            label_index.add_date_label(end_x, end_date_y, end_width)
+
+            # Elegant date labels
+            for date_x, date_y, date_width, date_text in ((start_x, start_date_y, start_width, start_date_text),
+                                                          (end_x, end_date_y, end_width, end_date_text)):
+                items.extend(_date_label_items(date_x, date_y, date_width, date_text, font_small, scale_factor))
+
+        else:
+            # Point event with flowing lines
+            line_height = 70 * scale_factor
+            top_point = (start_x, timeline_y - line_height)
+            bottom_point = (start_x, timeline_y + line_height)
+
+            # Elegant flowing vertical lines
+            for curve_start, curve_end in ((top_point, (start_x, timeline_y)), ((start_x, timeline_y), bottom_point)):
+                items.append({'type': 'polyline', 'points': curve_points(curve_start, curve_end, 0.3),
+                              'color': color, 'width': int(4 * scale_factor)})
+
+            # Elegant circle with soft glow; clusters get a larger marker and their date range
+            is_cluster = counts[i] > 1
+            circle_radius = int(MARKER_STYLES['cluster' if is_cluster else 'point']['circle_radius'] * scale_factor)
+            items.append({'type': 'marker', 'xy': (start_x, timeline_y), 'color': color,
+                          'kind': 'cluster' if is_cluster else 'point'})
+
+            # Smart date positioning with new format
+            date_text = format_date_readable(start_date)
+            if is_cluster:
+                date_text += ' – ' + format_date_readable(day_to_date(table.end_days[order[i]]))
+            date_width = measure_text(date_text, font_small, 10 * scale_factor)
+
+            date_y, date_above = get_optimal_date_position(
+                start_x, timeline_y, label_index, date_width, False)
+            label_index.add_date_label(start_x, date_y, date_width)
+
+            # Elegant date with background
+            items.extend(_date_label_items(start_x, date_y, date_width, date_text, font_small, scale_factor))
+
+            # Event description with elegant styling
+            event_text = labels[i]
+            event_width = measure_text(event_text, font_large, 16 * scale_factor)
+
+            # Elegant text background with shadow
+            text_padding = int(10 * scale_factor)
+            shadow_offset = int(3 * scale_factor)
+
+            # Alternate text positioning, stacking outward past other event titles
+            direction = -1 if i % 2 == 0 else 1
+            text_y = float(timeline_y + direction * 130 * scale_factor)
+            text_y += place_title_box(label_index, (
+                start_x - event_width / 2.0 - text_padding, text_y - 3 * scale_factor,
+                start_x + event_width / 2.0 + text_padding + shadow_offset, text_y + 28 * scale_factor + shadow_offset
+            ), direction, 40 * scale_factor, title_top, height)
+
+            if direction < 0:
+                connection_start = (start_x, timeline_y - circle_radius)
+                connection_end = (start_x, text_y + 30 * scale_factor)
+            else:
+                connection_start = (start_x, timeline_y + circle_radius)
+                connection_end = (start_x, text_y)
+
+            # Drop shadow
+            items.append({'type': 'rect', 'box': [
+                int(start_x - event_width / 2.0 - text_padding + shadow_offset), int(text_y - 3 * scale_factor + shadow_offset),
+                int(start_x + event_width / 2.0 + text_padding + shadow_offset), int(text_y + 28 * scale_factor + shadow_offset)
+            ], 'fill': (200, 200, 200)})
+
+            # Main background
+            items.append({'type': 'rect', 'box': [
+                int(start_x - event_width / 2.0 - text_padding), int(text_y - 3 * scale_factor),
+                int(start_x + event_width / 2.0 + text_padding), int(text_y + 28 * scale_factor)
+            ], 'fill': 'white', 'outline': color, 'width': int(2 * scale_factor)})
+
+            items.append({'type': 'text', 'xy': (int(start_x - event_width / 2.0), int(text_y)), 'text': event_text,
+                          'fill': color, 'font_size': font_large, 'text_width': event_width})
+
+            # Elegant curved connection line
+            items.append({'type': 'polyline', 'points': curve_points(connection_start, connection_end, 0.4),
+                          'color': 'gray', 'width': int(2 * scale_factor)})
+
+        item_rows.extend([rows[i]] * (len(items) - len(item_rows)))
+
+    # Add elegant title with styling
+    title = f"Timeline: {point_events} Events, {duration_events} Duration Events"
+    title_width = measure_text(title, font_title, 20 * scale_factor)
+
+    # Title with elegant shadow
+    shadow_offset = int(4 * scale_factor)
+    items.append({'type': 'text', 'xy': (int(width / 2.0 - title_width / 2.0 + shadow_offset), int(40 * scale_factor + shadow_offset)),
+                  'text': title, 'fill': (180, 180, 180), 'font_size': font_title, 'text_width': title_width})
+    items.append({'type': 'text', 'xy': (int(width / 2.0 - title_width / 2.0), int(40 * scale_factor)),
+                  'text': title, 'fill': 'black', 'font_size': font_title, 'text_width': title_width})
+
+    item_rows.extend([-1] * (len(items) - len(item_rows)))
+    return {'size': (width, height), 'scale_factor': scale_factor, 'items': items,
+            'item_rows': np.array(item_rows, dtype=np.intp)}
+
+# Key holding the event color in each item type; the other colors are fixed names or shades
+EVENT_COLOR_KEYS = {'polyline': 'color', 'marker': 'color', 'rect': 'outline', 'text': 'fill'}
+
+def recolor_item(item, old_rgb, new_rgb):
+    """Return item with its event color changed from old_rgb to new_rgb, or item itself if it has none."""
+    key = EVENT_COLOR_KEYS.get(item['type'])
+    if key is None or item.get(key) != old_rgb:
+        return item
+    return dict(item, **{key: new_rgb})
+
+def item_x_extent(item, scale_factor):
+    """Return the (x0, x1) canvas range a display-list item can paint into."""
+    kind = item['type']
+    if kind in ('rect', 'ellipse'):
+        return item['box'][0], item['box'][2]
+    if kind == 'text':
+        x = item['xy'][0]
+        return x, x + item['text_width']
+    if kind == 'marker':
+        radius = MARKER_STYLES[item['kind']]['glow_radius'] * scale_factor + 1
+        return item['xy'][0] - radius, item['xy'][0] + radius
+    points = np.asarray(item['points'])
+    half_width = item.get('width', 1)
+    return points[:, 0].min() - half_width, points[:, 0].max() + half_width
+
+def layout_extents(layout):
+    """Per-item (x0, x1) canvas extents of a layout as an (n, 2) float64 array."""
+    return np.array([item_x_extent(item, layout['scale_factor']) for item in layout['items']],
+                    dtype=np.float64).reshape(-1, 2)
+
+def _date_label_items(x, y, text_width, text, font_size, scale_factor):
+    """Boxed date label centered on x with its text top at y."""
+    date_padding = int(6 * scale_factor)
+    return [
+        {'type': 'rect', 'box': [
+            int(x - text_width / 2.0 - date_padding), int(y - 3 * scale_factor),
+            int(x + text_width / 2.0 + date_padding), int(y + 18 * scale_factor)
+        ], 'fill': 'white', 'outline': 'gray', 'width': int(1 * scale_factor)},
+        {'type': 'text', 'xy': (int(x - text_width / 2.0), int(y)), 'text': text,
+         'fill': 'black', 'font_size': font_size, 'text_width': text_width},
+    ]
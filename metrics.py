@@ -0,0 +1,203 @@
+"""Render-stage timing and Prometheus-format metrics.
+
+Code wraps its work in stage('name') (or adds measured seconds with
+add_stage_time); the time accumulates in the StageTimer that is current for
+this context, normally one per HTTP request or one per worker render. When a
+timer finishes, each stage total is observed once in the
+timeline_stage_seconds histogram, so a bucket counts renders, not calls.
+Render workers return their totals with the image and the web process merges
+them with record_stage_times, so histograms only ever live in the web process.
+"""
+
+import time
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+_current_timer = contextvars.ContextVar('timeline_stage_timer', default=None)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+EVENT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+BYTE_BUCKETS = (1 << 12, 1 << 14, 1 << 16, 1 << 18, 1 << 20, 1 << 22, 1 << 24)
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered in Prometheus text format."""
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            counts, totals = self._series.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0, 0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            totals[0] += value
+            totals[1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((key, list(counts), list(totals)) for key, (counts, totals) in self._series.items())
+        for key, counts, (total, count) in series:
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, key)]
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += bucket_count
+                le = bound if bound == '+Inf' else repr(float(bound))
+                bucket_labels = ','.join(labels + [f'le="{le}"'])
+                lines.append(f'{self.name}_bucket{{{bucket_labels}}} {cumulative}')
+            suffix = '{' + ','.join(labels) + '}' if labels else ''
+            lines.append(f'{self.name}_sum{suffix} {total}')
+            lines.append(f'{self.name}_count{suffix} {count}')
+        return '\n'.join(lines)
+
+class Counter:
+    """Monotonic counter per label set."""
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            labels = ','.join(f'{name}="{_escape(v)}"' for name, v in zip(self.label_names, key))
+            lines.append(f'{self.name}{{{labels}}} {value}' if labels else f'{self.name} {value}')
+        return '\n'.join(lines)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+stage_seconds = Histogram('timeline_stage_seconds', 'Time per render stage, one observation per request or render.',
+                          ['stage'])
+request_seconds = Histogram('timeline_request_seconds', 'HTTP request handling time.', ['endpoint', 'status'])
+requests_total = Counter('timeline_requests_total', 'HTTP requests handled.', ['endpoint', 'status'])
+render_events = Histogram('timeline_render_events', 'Events per render request.', buckets=EVENT_BUCKETS)
+output_bytes = Histogram('timeline_output_bytes', 'Encoded output size per render.', ['format'], buckets=BYTE_BUCKETS)
+
+REGISTRY = [stage_seconds, request_seconds, requests_total, render_events, output_bytes]
+
+class StageTimer:
+    """Per-context accumulator of seconds by stage name, in first-seen order."""
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+def push_timer():
+    """Make a fresh StageTimer current; returns (timer, token) for pop_timer."""
+    timer = StageTimer()
+    return timer, _current_timer.set(timer)
+
+def pop_timer(token):
+    _current_timer.reset(token)
+
+@contextmanager
+def stage_timer():
+    """Make a fresh StageTimer current for the block and yield it."""
+    timer, token = push_timer()
+    try:
+        yield timer
+    finally:
+        pop_timer(token)
+
+@contextmanager
+def render_stages():
+    """Collect one render's stages into the current timer, or into a fresh one observed on exit.
+
+    Renders inside a request add to the request's timer; renders on background
+    threads (jobs, batches) still produce one observation per stage.
+    """
+    if _current_timer.get() is not None:
+        yield
+        return
+    with stage_timer() as timer:
+        try:
+            yield
+        finally:
+            observe_stages(timer)
+
+def current_timer():
+    return _current_timer.get()
+
+def add_stage_time(name, seconds):
+    """Add seconds to stage name in the current timer; without one the time is observed directly."""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add(name, seconds)
+    else:
+        stage_seconds.observe(seconds, stage=name)
+
+@contextmanager
+def stage(name):
+    """Time the block as part of stage name."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_stage_time(name, time.perf_counter() - start)
+
+def timed(name):
+    """Decorator form of stage(name)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                add_stage_time(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def record_stage_times(stages):
+    """Merge stage totals measured elsewhere (e.g. in a render worker) into this context."""
+    for name, seconds in stages.items():
+        add_stage_time(name, seconds)
+
+def observe_stages(timer):
+    """Observe each of timer's stage totals once in the stage histogram."""
+    for name, seconds in timer.stages.items():
+        stage_seconds.observe(seconds, stage=name)
+
+def server_timing(timer, total=None):
+    """Format timer's stages as a Server-Timing header value (milliseconds)."""
+    entries = [f'{name};dur={seconds * 1000:.1f}' for name, seconds in timer.stages.items()]
+    if total is not None:
+        entries.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(entries)
+
+def stats_lines(name, help_text, metric_type, label_name, values):
+    """Exposition lines for a metric read from stats() dicts; values maps label value -> number."""
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}']
+    for label, value in values.items():
+        if value is not None:
+            lines.append(f'{name}{{{label_name}="{_escape(label)}"}} {value}')
+    return lines
+
+def render_metrics(extra_lines=()):
+    """All metrics in Prometheus text exposition format."""
+    return '\n'.join([metric.render() for metric in REGISTRY] + list(extra_lines)) + '\n'
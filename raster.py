@@ -0,0 +1,104 @@
+"""Pillow backend: paints a layout display list onto an RGB image."""
+
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from curves import draw_polyline
+from layout import QUALITY_MODES, compute_layout, layout_extents, output_geometry
+from metrics import add_stage_time, stage
+from sprites import marker_sprites
+from text_cache import glyph_runs
+
+# Output pixels painted past each side of a partial render so resampling and blur do not leave
+# seams: LANCZOS reads 3 output pixels either side at 2x supersampling and SMOOTH_MORE 2 more
+FINISH_BLEED = 6
+
+# Render stage each display-list item type is timed under
+ITEM_STAGES = {'polyline': 'curves', 'marker': 'markers', 'text': 'text',
+               'rect': 'shapes', 'line': 'shapes', 'ellipse': 'shapes'}
+
+def draw_items(img, items, scale_factor, offset=(0, 0)):
+    """Paint display-list items onto img, shifted by -offset (used for partial renders)."""
+    draw = ImageDraw.Draw(img)
+    dx, dy = offset
+    spent = dict.fromkeys(ITEM_STAGES.values(), 0.0)
+    for item in items:
+        start = time.perf_counter()
+        kind = item['type']
+        if kind == 'polyline':
+            points = item['points']
+            if dx or dy:
+                points = points - (int(dx), int(dy))
+            draw_polyline(draw, points, item['color'], item['width'], item.get('joints', ()))
+        elif kind == 'marker':
+            x, y = item['xy']
+            marker_sprites.draw(img, x - dx, y - dy, item['color'], item['kind'], scale_factor)
+        elif kind == 'rect':
+            x0, y0, x1, y1 = item['box']
+            draw.rectangle([x0 - dx, y0 - dy, x1 - dx, y1 - dy], fill=item.get('fill'),
+                           outline=item.get('outline'), width=item.get('width', 1))
+        elif kind == 'text':
+            x, y = item['xy']
+            glyph_runs.draw(img, (x - dx, y - dy), item['text'], item['fill'], item['font_size'])
+        elif kind == 'line':
+            draw.line([(x - dx, y - dy) for x, y in item['points']], fill=item['color'], width=item['width'])
+        elif kind == 'ellipse':
+            x0, y0, x1, y1 = item['box']
+            draw.ellipse([x0 - dx, y0 - dy, x1 - dx, y1 - dy], fill=item['fill'])
+        spent[ITEM_STAGES.get(kind, 'shapes')] += time.perf_counter() - start
+
+    # One total per stage, so timing costs two clock reads per item
+    for name, seconds in spent.items():
+        if seconds:
+            add_stage_time(name, seconds)
+    return img
+
+def rasterize(layout):
+    """Paint a full layout onto a new white canvas of its size."""
+    img = Image.new('RGB', layout['size'], 'white')
+    return draw_items(img, layout['items'], layout['scale_factor'])
+
+def finish_image(img, output_size, quality):
+    """Downsample a supersampled canvas to output_size and apply the mode's softening."""
+    # Scale down for final output while maintaining quality
+    if img.size != output_size:
+        with stage('resize'):
+            img = img.resize(output_size, Image.LANCZOS)
+
+    # Apply subtle blur for softer appearance
+    if QUALITY_MODES[quality]['smooth']:
+        with stage('smooth'):
+            img = img.filter(ImageFilter.SMOOTH_MORE)
+    return img
+
+def render_columns(layout, left, right, output_size, quality):
+    """Render output columns [left, right) of a layout, painting only the items that reach them.
+
+    The result matches the same columns of a full render; layout['extents'] is
+    used when present (see layout.layout_extents).
+    """
+    supersample = QUALITY_MODES[quality]['supersample']
+    extents = layout['extents'] if 'extents' in layout else layout_extents(layout)
+
+    # Paint the columns plus a bleed margin on the supersampled canvas, finish, then crop
+    bleed_left = max(0, left - FINISH_BLEED)
+    bleed_right = min(output_size[0], right + FINISH_BLEED)
+    x0, x1 = bleed_left * supersample, bleed_right * supersample
+    visible = np.flatnonzero((extents[:, 1] >= x0) & (extents[:, 0] <= x1))
+
+    canvas = Image.new('RGB', (x1 - x0, layout['size'][1]), 'white')
+    draw_items(canvas, [layout['items'][i] for i in visible], layout['scale_factor'], offset=(x0, 0))
+    img = finish_image(canvas, (bleed_right - bleed_left, output_size[1]), quality)
+    return img.crop((left - bleed_left, 0, right - bleed_left, output_size[1]))
+
+def create_timeline_image(events, quality='standard', scale=None, width=None, height=None, cluster=True):
+    """Generate a timeline image from a list of events at the requested quality and size."""
+    if not events:
+        return None
+
+    # Draw on a supersampled canvas; draft renders directly at output resolution
+    output_size, canvas_size, scale_factor = output_geometry(quality, scale, width, height)
+    layout = compute_layout(events, canvas_size, scale_factor, cluster)
+    return finish_image(rasterize(layout), output_size, quality)
@@ -0,0 +1,126 @@
+"""Content-addressed cache of encoded timeline images."""
+
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+
+from lru import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the drawing code changes output so stale disk entries are ignored
+RENDERER_VERSION = 3
+
+def normalize_event(event):
+    """Reduce an event to the fields that affect rendering, in canonical form."""
+    return {
+        'date': str(event['date']),
+        'end_date': str(event['end_date']) if event.get('end_date') else None,
+        'event': str(event['event']),
+        'color': str(event.get('color', '#dc3545')).lower(),
+    }
+
+def render_key(events, options):
+    """Return a stable SHA-256 hex digest of the normalized events plus render options."""
+    payload = {
+        'version': RENDERER_VERSION,
+        'events': [normalize_event(event) for event in events],
+        'options': options,
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def is_render_key(value):
+    """True if value has the form of a render_key() digest: 64 lowercase hex digits."""
+    return len(value) == 64 and not value.strip('0123456789abcdef')
+
+class RenderCache:
+    """Two-tier cache: a byte-bounded in-memory LRU in front of an optional directory."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, cache_dir=None, max_disk_bytes=512 * 1024 * 1024):
+        self._memory = LRUCache(max_bytes=max_bytes, sizeof=len)
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._disk_lock = threading.Lock()
+        self.disk_hits = 0
+        self.disk_bytes = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            self.disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def get(self, key):
+        """Return cached bytes for key from memory, then disk, or None."""
+        data = self._memory.get(key)
+        if data is not None or not self.cache_dir:
+            return data
+
+        try:
+            with open(self._path(key), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        self.disk_hits += 1
+        self._memory.put(key, data)
+        return data
+
+    def put(self, key, data):
+        self._memory.put(key, data)
+        if self.cache_dir:
+            self._write_disk(key, data)
+
+    def stats(self):
+        stats = self._memory.stats()
+        lookups = stats['hits'] + stats['misses']
+        stats['disk_hits'] = self.disk_hits
+        stats['disk_bytes'] = self.disk_bytes
+        # Memory misses served from disk still count as cache hits overall
+        stats['hit_ratio'] = round((stats['hits'] + self.disk_hits) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _write_disk(self, key, data):
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so readers never see a partial image
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write render cache entry {key}: {e}")
+            return
+
+        with self._disk_lock:
+            self.disk_bytes += len(data)
+            if self.disk_bytes > self.max_disk_bytes:
+                self._prune_disk()
+
+    def _prune_disk(self):
+        """Delete the oldest entries until the directory is back under 90% of its budget."""
+        target = self.max_disk_bytes * 0.9
+        for mtime, size, path in sorted(self._disk_entries()):
+            if self.disk_bytes <= target:
+                break
+            try:
+                os.remove(path)
+                self.disk_bytes -= size
+            except OSError:
+                continue
+
+    def _disk_entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield stat.st_mtime, stat.st_size, path
@@ -0,0 +1,156 @@
+"""Render CSV files to timeline images without the web server.
+
+Inputs follow the /upload_csv rules (date, event, optional end_date and color
+columns). Files render in parallel on a process pool; each output's content
+hash is recorded in the output directory, so unchanged inputs are skipped on
+the next run.
+
+Usage: python render_cli.py data/ 'exports/*.csv' -o out/ --format webp --quality draft
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from csv_ingest import error_summary, open_text_stream, parse_csv_table
+from encoders import OUTPUT_FORMATS, normalize_encode_options, resolve_format
+from layout import QUALITY_MODES, normalize_render_options, preload_fonts
+from render_cache import render_key
+from renderer import render_timeline
+
+MANIFEST_NAME = '.render-manifest.json'  # Output file name -> content hash of its last render
+
+def find_inputs(patterns):
+    """Expand directories and glob patterns to a sorted, de-duplicated list of CSV paths."""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.update(glob.glob(os.path.join(pattern, '*.csv')))
+        else:
+            paths.update(path for path in glob.glob(pattern) if os.path.isfile(path))
+    return sorted(paths)
+
+def output_name(path, fmt):
+    return os.path.splitext(os.path.basename(path))[0] + '.' + fmt
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, MANIFEST_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def render_file(path, output_path, options, fmt, encode_options, previous_key=None):
+    """Validate and render one CSV, writing output_path; returns a result dict (runs in a worker)."""
+    start = time.perf_counter()
+    result = {'path': path, 'output': output_path, 'events': 0}
+    try:
+        with open(path, 'rb') as f:
+            table, errors, error_count = parse_csv_table(open_text_stream(f))
+        if error_count:
+            raise ValueError(error_summary(errors, error_count))
+        if not table:
+            raise ValueError('No valid events found in CSV file')
+
+        result['events'] = len(table)
+        result['key'] = render_key(table.to_dicts(), dict(options, format=fmt, encoder=encode_options))
+        if result['key'] == previous_key and os.path.exists(output_path):
+            result['status'] = 'skipped'
+        else:
+            data = render_timeline(table, options, fmt, encode_options)
+            tmp_path = output_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, output_path)
+            result['status'] = 'rendered'
+            result['bytes'] = len(data)
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = str(e)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('inputs', nargs='+', help='CSV files, directories or glob patterns')
+    parser.add_argument('-o', '--output-dir', default='.')
+    parser.add_argument('-f', '--format', default='png', choices=sorted(OUTPUT_FORMATS) + ['jpg'])
+    parser.add_argument('--quality', default='standard', choices=sorted(QUALITY_MODES))
+    parser.add_argument('--scale', type=float)
+    parser.add_argument('--width', type=int)
+    parser.add_argument('--height', type=int)
+    parser.add_argument('--no-cluster', action='store_true', help='draw every event instead of clustering dense runs')
+    parser.add_argument('--compress-level', type=int, help='PNG zlib level 0-9')
+    parser.add_argument('--image-quality', type=int, help='WebP/JPEG quality 1-100')
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--force', action='store_true', help='re-render even when the output is up to date')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    request = {'quality': args.quality, 'scale': args.scale, 'width': args.width, 'height': args.height,
+               'cluster': not args.no_cluster, 'compress_level': args.compress_level,
+               'image_quality': args.image_quality}
+    try:
+        fmt = resolve_format(args.format)
+        options = normalize_render_options(request)
+        encode_options = normalize_encode_options(fmt, request)
+    except ValueError as e:
+        print(f'error: {e}', file=sys.stderr)
+        return 2
+
+    paths = find_inputs(args.inputs)
+    if not paths:
+        print('error: no CSV files matched', file=sys.stderr)
+        return 2
+    # Outputs are named by basename alone, so inputs sharing one would overwrite each other
+    outputs = {}
+    for path in paths:
+        outputs.setdefault(output_name(path, fmt), []).append(path)
+    clashes = {name: inputs for name, inputs in outputs.items() if len(inputs) > 1}
+    if clashes:
+        for name, inputs in clashes.items():
+            print(f"error: {', '.join(inputs)} would all render to {name}; rename or render them separately",
+                  file=sys.stderr)
+        return 2
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest = {} if args.force else load_manifest(args.output_dir)
+
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=preload_fonts) as executor:
+        futures = []
+        for name, (path,) in outputs.items():
+            futures.append(executor.submit(render_file, path, os.path.join(args.output_dir, name),
+                                           options, fmt, encode_options, manifest.get(name)))
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if result['status'] != 'failed':
+                manifest[os.path.basename(result['output'])] = result['key']
+            detail = result.get('error') or (f"{result['bytes'] / 1024:.1f} KB" if 'bytes' in result else '')
+            print(f"{result['status']:<9}{result['seconds'] * 1000:>9.1f} ms{result['events']:>8} events  "
+                  f"{result['path']}  {detail}")
+    save_manifest(args.output_dir, manifest)
+
+    elapsed = time.perf_counter() - start
+    counts = {status: sum(r['status'] == status for r in results) for status in ('rendered', 'skipped', 'failed')}
+    rendered_events = sum(r['events'] for r in results if r['status'] == 'rendered')
+    print(f"\n{len(results)} files in {elapsed:.2f}s: {counts['rendered']} rendered, {counts['skipped']} skipped, "
+          f"{counts['failed']} failed; {counts['rendered'] / elapsed:.1f} files/s, "
+          f"{rendered_events / elapsed:.0f} events/s")
+    return 1 if counts['failed'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
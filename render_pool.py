@@ -0,0 +1,247 @@
+"""Process pool that renders timelines outside the Flask request threads.
+
+Rendering is CPU-bound Python and Pillow work, so running it in request threads
+lets the GIL serialize every concurrent render. RenderPool hands each render to
+a warm worker process (fonts preloaded by the initializer) and returns the
+encoded bytes. Admission is bounded: once every worker is busy and the queue is
+full, submit() raises RenderPoolFull instead of letting requests pile up.
+"""
+
+import os
+import time
+import signal
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from layout import preload_fonts
+from metrics import add_stage_time, record_stage_times, stage, stage_timer
+from renderer import render_timeline
+from tiles import render_cached_tile
+
+logger = logging.getLogger(__name__)
+
+# Extra time the parent waits past the worker's own alarm before killing the pool
+HARD_TIMEOUT_GRACE = 5.0
+
+class RenderPoolFull(Exception):
+    """Every worker is busy and the wait queue is full."""
+
+class RenderTimeout(Exception):
+    """A render ran past the per-render time limit."""
+
+class RenderPoolError(Exception):
+    """The worker process died before returning a result."""
+
+class _RenderDeadline(BaseException):
+    """Raised by a worker's alarm; not an Exception, so the renderer's fallbacks cannot swallow it."""
+
+def _init_worker():
+    """Warm a new worker: ignore Ctrl-C (the parent handles shutdown) and preload fonts."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    preload_fonts()
+
+def _on_alarm(signum, frame):
+    raise _RenderDeadline()
+
+def _render_job(timeout, render, *args):
+    """Worker entry point: run render(*args) with a soft alarm so runaway Python code stops itself.
+
+    Returns (data, stages), the encoded bytes and this render's stage timings.
+    """
+    use_alarm = timeout and hasattr(signal, 'setitimer')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        try:
+            with stage_timer() as timer:
+                with stage('render'):
+                    data = render(*args)
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+    except _RenderDeadline:
+        raise RenderTimeout('Render timed out') from None
+    return data, timer.stages
+
+def _noop():
+    return os.getpid()
+
+class RenderPool:
+    """Bounded ProcessPoolExecutor front end with backpressure and per-render timeouts.
+
+    At most workers + max_queue renders are admitted at once. A render that
+    overruns timeout is interrupted inside its worker; if the worker is stuck in
+    C code and does not respond, the whole pool is killed and replaced.
+
+    With max_renders set, the pool is recycled after workers * max_renders
+    renders: new renders go to a fresh executor while the old one finishes its
+    in-flight work and exits, which caps memory growth inside long-lived
+    workers. With the 'forkserver' start method, preload names modules the
+    fork server imports once, so every worker (including replacements) is
+    forked already warm and shares those pages copy-on-write.
+    """
+
+    def __init__(self, workers=None, max_queue=None, timeout=30.0, start_method='spawn', max_renders=None,
+                 preload=()):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = self.workers * 2 if max_queue is None else max_queue
+        self.timeout = timeout
+        self.max_renders = max_renders
+        self._context = multiprocessing.get_context(start_method)
+        if preload and start_method == 'forkserver':
+            # The fork server does not inherit sys.path (and skips preloads it cannot
+            # import), so make this directory importable through the environment
+            app_dir = os.path.dirname(os.path.abspath(__file__))
+            os.environ['PYTHONPATH'] = os.pathsep.join(filter(None, [app_dir, os.environ.get('PYTHONPATH')]))
+            self._context.set_forkserver_preload(list(preload))
+        self._executor_renders = 0
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._executor = None
+        self.submitted = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.restarts = 0
+        self.recycles = 0
+        self.in_flight = 0
+
+    def start(self):
+        """Create the executor and wait until every worker process is up and warm."""
+        with self._lock:
+            executor = self._current_executor()
+            futures = [executor.submit(_noop) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+        logger.info(f"Render pool started with {self.workers} workers, queue of {self.max_queue}")
+        return self
+
+    def render(self, events, options, fmt='png', encode_options=None):
+        """Render in a worker and return the encoded bytes.
+
+        Raises RenderPoolFull when the pool is saturated, RenderTimeout when the
+        render overruns and RenderPoolError if the worker dies. ValueErrors and
+        other exceptions raised by the renderer are re-raised unchanged.
+        """
+        return self._run(render_timeline, events, options, fmt, encode_options)
+
+    def render_tile(self, tile_set_id, events, options, zoom, x, fmt='png'):
+        """Render one tile in a worker and return its encoded bytes; raises like render().
+
+        Each worker keeps the tile sets it has laid out (see tiles.render_cached_tile),
+        so later tiles of the same zoom level reuse the layout.
+        """
+        return self._run(render_cached_tile, tile_set_id, events, options, zoom, x, fmt)
+
+    def _run(self, render, *args):
+        """Admit, submit and await render(*args) in a worker, applying the pool's limits."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise RenderPoolFull('Render queue is full; retry shortly')
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+        try:
+            start = time.perf_counter()
+            executor, future = self._submit(_render_job, self.timeout, render, *args)
+            hard_timeout = self.timeout + HARD_TIMEOUT_GRACE if self.timeout else None
+            try:
+                data, stages = future.result(timeout=hard_timeout)
+            except RenderTimeout:
+                self._count('timeouts')
+                raise
+            except FutureTimeoutError:
+                self._count('timeouts')
+                logger.error(f"Render exceeded {hard_timeout}s without yielding; restarting render pool")
+                self._restart(executor)
+                raise RenderTimeout('Render timed out')
+            except BrokenProcessPool:
+                self._count('failures')
+                self._restart(executor)
+                raise RenderPoolError('Render worker exited unexpectedly')
+            # Worker timings join the caller's; pool_wait is queueing plus pickling both ways
+            record_stage_times(stages)
+            add_stage_time('pool_wait', time.perf_counter() - start - stages.get('render', 0.0))
+            return data
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'timeout': self.timeout,
+                'in_flight': self.in_flight,
+                'submitted': self.submitted,
+                'rejected': self.rejected,
+                'timeouts': self.timeouts,
+                'failures': self.failures,
+                'restarts': self.restarts,
+                'max_renders': self.max_renders,
+                'recycles': self.recycles,
+            }
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _current_executor(self):
+        """The executor new renders go to, created on first use; the caller holds _lock."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=self._context,
+                                                 initializer=_init_worker)
+            self._executor_renders = 0
+        return self._executor
+
+    def _submit(self, fn, *args):
+        """Submit to the current executor and return (executor, future), retiring it once it has had its share.
+
+        Picking the executor, submitting and retiring happen under one lock, so no
+        render is ever submitted to an executor that is already shutting down.
+        """
+        with self._lock:
+            executor = self._current_executor()
+            future = executor.submit(fn, *args)
+            if not self.max_renders:
+                return executor, future
+            self._executor_renders += 1
+            if self._executor_renders < self.max_renders * self.workers:
+                return executor, future
+            self._executor = None
+            self.recycles += 1
+            # Fork the replacement workers now rather than on the next render
+            replacement = self._current_executor()
+            for _ in range(self.workers):
+                replacement.submit(_noop)
+        # ProcessPoolExecutor(max_tasks_per_child=...) can hang on Python 3.11, so the
+        # whole executor is replaced; its queued and running renders still complete
+        logger.info(f"Recycling render pool after {self.max_renders * self.workers} renders")
+        executor.shutdown(wait=False)
+        return executor, future
+
+    def _restart(self, executor):
+        """Kill executor's processes and drop it so the next render starts a fresh pool."""
+        with self._lock:
+            # A recycled executor is no longer current but may still hold the stuck worker;
+            # terminating an already replaced one again is harmless
+            if self._executor is executor:
+                self._executor = None
+                self.restarts += 1
+        # ProcessPoolExecutor cannot cancel a running task, so terminate its workers
+        for process in list((getattr(executor, '_processes', None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,12 @@
+"""Single entry point from events and options to encoded output bytes for any format."""
+
+from encoders import encode_image
+from raster import create_timeline_image
+from svg import create_timeline_svg
+
+def render_timeline(events, options, fmt='png', encode_options=None):
+    """Render events with normalized render options and return bytes in fmt."""
+    if fmt == 'svg':
+        return create_timeline_svg(events, **options).encode('utf-8')
+    img = create_timeline_image(events, **options)
+    return encode_image(img, fmt, **(encode_options or {}))
@@ -0,0 +1,235 @@
+"""Server-side editing sessions that re-render only what a patch changed.
+
+A TimelineSession keeps its events with their parsed EventTable, the last
+layout and the finished output image. A patch parses only the events it adds
+or updates; the other rows are taken from the kept table.
+
+A patch that only recolors events moves nothing, so the kept layout is reused:
+the recolored events' items are restyled in place (layout['item_rows'] finds
+them) and just their columns are repainted. Any other patch re-runs the layout
+and diffs the new display list against the old one: if the date range moved,
+every x position changes and the image is redrawn in full; otherwise only the
+output columns touched by removed or added items are repainted and pasted into
+the kept image.
+
+Layout is global (events alternate above/below by their sorted position and
+labels are placed greedily), so adding or deleting an event can also move the
+labels of later events; the diff catches that, and the repaint grows to match.
+"""
+
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+
+from encoders import encode_image
+from events import EventTable
+from layout import QUALITY_MODES, compute_layout, hex_to_rgb, layout_extents, output_geometry, recolor_item
+from raster import FINISH_BLEED, finish_image, rasterize, render_columns
+
+# Repaint everything once the dirty columns cover more than this share of the width
+FULL_REDRAW_FRACTION = 0.5
+
+def _freeze(value):
+    """Hashable form of a display-list value (numpy points compare by content)."""
+    if isinstance(value, np.ndarray):
+        return value.tobytes()
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+def item_signature(item):
+    """Hashable content of a display-list item; layout builds each item type with a fixed key order."""
+    return tuple(_freeze(value) for value in item.values())
+
+def merge_spans(spans):
+    """Merge overlapping or touching [left, right) spans, sorted by left."""
+    merged = []
+    for left, right in sorted(spans):
+        if merged and left <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], right)
+        else:
+            merged.append([left, right])
+    return merged
+
+class TimelineSession:
+    """One editable timeline: events keyed by id, plus the table, layout and image of the last render.
+
+    table, if given, is the already-parsed EventTable of events and is reused as is.
+    """
+
+    def __init__(self, events, options, fmt='png', encode_options=None, table=None):
+        self.options = options
+        self.fmt = fmt
+        self.encode_options = encode_options or {}
+        self.events = {str(i): self._clean(event) for i, event in enumerate(events, 1)}
+        self._next_id = len(self.events) + 1
+        self.version = 0
+        self.lock = threading.Lock()
+        self.table = None
+        self._layout = None
+        self._signatures = None
+        self._day_range = None
+        self.image = None
+        self.data = None
+        if table is None:
+            table = EventTable.from_events(list(self.events.values()))
+        self.last_render = self._render(table)
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the kept image and encoded bytes."""
+        image_bytes = self.image.width * self.image.height * 3 if self.image is not None else 0
+        return image_bytes + len(self.data or b'')
+
+    def event_list(self):
+        return [dict(event, id=event_id) for event_id, event in self.events.items()]
+
+    def apply(self, patches):
+        """Apply add/update/delete patches atomically and re-render; raises ValueError on a bad patch."""
+        events = dict(self.events)
+        next_id = self._next_id
+        for patch in patches:
+            if not isinstance(patch, dict):
+                raise ValueError('Each patch must be an object')
+            op = patch.get('op')
+            if op == 'add':
+                events[str(next_id)] = self._clean(patch.get('event'))
+                next_id += 1
+            elif op in ('update', 'delete'):
+                event_id = str(patch.get('id'))
+                if event_id not in events:
+                    raise ValueError(f'Unknown event id: {event_id}')
+                if op == 'update':
+                    changes = patch.get('event') or {}
+                    if not isinstance(changes, dict):
+                        raise ValueError('An update patch needs an event object')
+                    events[event_id] = self._clean(dict(events[event_id], **changes))
+                else:
+                    del events[event_id]
+            else:
+                raise ValueError('Each patch needs an op of add, update or delete')
+        if not events:
+            raise ValueError('A timeline needs at least one event')
+        # Validate the whole result before touching the session
+        table = self._table_for(events)
+        recolored = self._recolored_rows(events)
+
+        self.events = events
+        self._next_id = next_id
+        self.last_render = self._render(table, recolored)
+        return self.last_render
+
+    def _clean(self, event):
+        if not isinstance(event, dict):
+            raise ValueError('Each event must be an object')
+        return {key: event[key] for key in ('date', 'end_date', 'event', 'color') if event.get(key)}
+
+    def _table_for(self, events):
+        """EventTable of events in order, parsing only the ones added or updated since the last render."""
+        # Unchanged events are the very same dicts as in self.events
+        fresh = [event_id for event_id, event in events.items() if self.events.get(event_id) is not event]
+        if not fresh:
+            tables = [self.table]
+        else:
+            tables = [self.table, EventTable.from_events([events[event_id] for event_id in fresh])]
+        rows = {event_id: row for row, event_id in enumerate(self.events)}
+        rows.update((event_id, len(self.table) + j) for j, event_id in enumerate(fresh))
+        return EventTable.concat(tables).take([rows[event_id] for event_id in events])
+
+    def _recolored_rows(self, events):
+        """Rows whose events changed only their color, or None if the patch changed anything else."""
+        if list(events) != list(self.events):
+            return None
+        rows = []
+        for row, (event_id, event) in enumerate(events.items()):
+            old = self.events[event_id]
+            if event is old:
+                continue
+            if {key: value for key, value in event.items() if key != 'color'} != \
+                    {key: value for key, value in old.items() if key != 'color'}:
+                return None
+            rows.append(row)
+        return rows
+
+    def _render(self, table, recolored=None):
+        """Re-render after an edit, repainting only dirty columns when the date range is unchanged."""
+        start = time.perf_counter()
+        quality = self.options['quality']
+        output_size, canvas_size, scale_factor = output_geometry(
+            quality, self.options['scale'], self.options['width'], self.options['height'])
+        day_range = table.day_range()
+
+        if recolored is not None:
+            layout, signatures, spans = self._recolor(table, recolored, output_size)
+        else:
+            layout = compute_layout(table, canvas_size, scale_factor, self.options.get('cluster', True))
+            layout['extents'] = layout_extents(layout)
+            signatures = [item_signature(item) for item in layout['items']]
+            spans = None
+            if self.image is not None and day_range == self._day_range:
+                spans = self._dirty_spans(layout, signatures, output_size)
+
+        if spans is None or sum(right - left for left, right in spans) > FULL_REDRAW_FRACTION * output_size[0]:
+            strategy = 'full'
+            self.image = finish_image(rasterize(layout), output_size, quality)
+            dirty_width = output_size[0]
+        else:
+            strategy = 'partial' if spans else 'unchanged'
+            for left, right in spans:
+                self.image.paste(render_columns(layout, left, right, output_size, quality), (left, 0))
+            dirty_width = sum(right - left for left, right in spans)
+
+        if strategy != 'unchanged' or self.data is None:
+            self.data = encode_image(self.image, self.fmt, **self.encode_options)
+            self.version += 1
+        self.table = table
+        self._layout = layout
+        self._signatures = signatures
+        self._day_range = day_range
+        return {
+            'strategy': strategy,
+            'dirty_fraction': round(dirty_width / output_size[0], 4),
+            'render_ms': round((time.perf_counter() - start) * 1000, 1),
+        }
+
+    def _recolor(self, table, rows, output_size):
+        """The kept layout with rows restyled in table's colors, with its signatures and dirty spans."""
+        layout = dict(self._layout, items=list(self._layout['items']))
+        signatures = list(self._signatures)
+        spans = []
+        for row in rows:
+            old_rgb = hex_to_rgb(self.table.color(row))
+            new_rgb = hex_to_rgb(table.color(row))
+            if old_rgb == new_rgb:
+                continue
+            # Rows folded into a cluster have no items of their own; the cluster keeps its color
+            for index in np.flatnonzero(layout['item_rows'] == row):
+                layout['items'][index] = recolor_item(layout['items'][index], old_rgb, new_rgb)
+                signatures[index] = item_signature(layout['items'][index])
+                spans.append(self._column_span(*layout['extents'][index], output_size))
+        return layout, signatures, merge_spans(spans)
+
+    def _dirty_spans(self, layout, signatures, output_size):
+        """Output-column spans covering every item that was removed or added since the last render."""
+        removed = Counter(self._signatures)
+        removed.subtract(signatures)
+        added = Counter(signatures)
+        added.subtract(self._signatures)
+
+        spans = []
+        for extents, item_signatures, changed in ((self._layout['extents'], self._signatures, removed),
+                                                  (layout['extents'], signatures, added)):
+            for (x0, x1), signature in zip(extents, item_signatures):
+                if changed[signature] > 0:
+                    spans.append(self._column_span(x0, x1, output_size))
+        return merge_spans(spans)
+
+    def _column_span(self, x0, x1, output_size):
+        """Output columns a canvas item spanning [x0, x1) can change once finished."""
+        supersample = QUALITY_MODES[self.options['quality']]['supersample']
+        # Finishing spreads a canvas change over a few neighbouring output columns
+        left = max(0, int(x0 // supersample) - FINISH_BLEED)
+        right = min(output_size[0], int(-(-x1 // supersample)) + FINISH_BLEED)
+        return left, right
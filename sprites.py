@@ -0,0 +1,72 @@
+"""Pre-rendered RGBA marker sprites pasted at each event position."""
+
+import math
+
+from PIL import Image, ImageDraw
+
+from lru import LRUCache
+
+# Marker geometry in unscaled pixels; insets are fixed like the original drawing code
+MARKER_STYLES = {
+    'point': {
+        'circle_radius': 10, 'glow_radius': 15, 'glow_alpha': 40, 'glow_step': 5,
+        'border_width': 4, 'inset': 3,
+    },
+    'duration': {
+        'circle_radius': 8, 'glow_radius': 12, 'glow_alpha': 60, 'glow_step': 8,
+        'border_width': 3, 'inset': 2,
+    },
+    # Collapsed run of point events (clusters.py)
+    'cluster': {
+        'circle_radius': 14, 'glow_radius': 20, 'glow_alpha': 40, 'glow_step': 4,
+        'border_width': 4, 'inset': 3,
+    },
+}
+
+def render_marker_sprite(color, kind, scale_factor):
+    """Render a marker (soft glow, bordered circle, inner ring) onto a transparent tile."""
+    style = MARKER_STYLES[kind]
+    circle_radius = int(style['circle_radius'] * scale_factor)
+    glow_radius = int(style['glow_radius'] * scale_factor)
+    size = 2 * glow_radius + 1
+    c = glow_radius  # Tile center
+
+    tile = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(tile)
+
+    # Soft glow effect
+    for r in range(glow_radius, circle_radius, -1):
+        alpha = max(0, style['glow_alpha'] - (glow_radius - r) * style['glow_step'])
+        glow_color = tuple(min(255, int(v + alpha)) for v in color)
+        draw.ellipse([c - r, c - r, c + r, c + r], fill=glow_color)
+
+    # Main circle with elegant border
+    inset = style['inset']
+    draw.ellipse([c - circle_radius, c - circle_radius, c + circle_radius, c + circle_radius],
+                 fill=tuple(color), outline='white', width=int(style['border_width'] * scale_factor))
+    draw.ellipse([c - circle_radius + inset, c - circle_radius + inset,
+                  c + circle_radius - inset, c + circle_radius - inset],
+                 outline='black', width=int(1 * scale_factor))
+    return tile
+
+class MarkerSpriteCache:
+    """LRU of marker tiles keyed by (color, kind, scale_factor), bounded by bytes."""
+
+    def __init__(self, max_bytes=16 * 1024 * 1024):
+        self._tiles = LRUCache(max_bytes=max_bytes, sizeof=lambda tile: tile.width * tile.height * 4)
+
+    def get(self, color, kind, scale_factor):
+        key = (tuple(color), kind, scale_factor)
+        return self._tiles.get_or_create(key, lambda: render_marker_sprite(color, kind, scale_factor))
+
+    def draw(self, img, x, y, color, kind, scale_factor):
+        """Alpha-composite the marker centered on (x, y)."""
+        tile = self.get(color, kind, scale_factor)
+        half = tile.width // 2
+        # floor, not int(): centers left of a partial canvas's origin are negative
+        img.paste(tile, (math.floor(x) - half, math.floor(y) - half), tile)
+
+    def stats(self):
+        return self._tiles.stats()
+
+marker_sprites = MarkerSpriteCache()
@@ -0,0 +1,129 @@
+"""SVG backend: serializes a layout display list as a standalone vector document."""
+
+from xml.sax.saxutils import escape, quoteattr
+
+from curves import resolve_color
+from fonts import get_font
+from layout import compute_layout, output_geometry
+from metrics import timed
+from sprites import MARKER_STYLES
+
+SVG_FONT_FALLBACK = 'sans-serif'
+
+def _color(color):
+    """Return an SVG color string for a color name, hex string or RGB tuple."""
+    return '#%02x%02x%02x' % tuple(resolve_color(color))
+
+def _num(value):
+    """Format a coordinate compactly (integers without a trailing .0)."""
+    value = round(float(value), 2)
+    return str(int(value)) if value.is_integer() else str(value)
+
+def _marker_def(marker_id, color, kind, scale_factor):
+    """Marker group matching sprites.render_marker_sprite, centered on the origin."""
+    style = MARKER_STYLES[kind]
+    circle_radius = int(style['circle_radius'] * scale_factor)
+    glow_radius = int(style['glow_radius'] * scale_factor)
+    parts = [f'<g id="{marker_id}">']
+
+    # Soft glow rings, outermost (lightest) first
+    for r in range(glow_radius, circle_radius, -1):
+        alpha = max(0, style['glow_alpha'] - (glow_radius - r) * style['glow_step'])
+        glow_color = tuple(min(255, int(v + alpha)) for v in color)
+        parts.append(f'<circle r="{r}" fill="{_color(glow_color)}"/>')
+
+    # Pillow strokes outlines inside the shape; SVG strokes are centered on it
+    border = int(style['border_width'] * scale_factor)
+    ring = max(1, int(1 * scale_factor))
+    parts.append(f'<circle r="{circle_radius}" fill="#ffffff"/>')
+    parts.append(f'<circle r="{_num(circle_radius - border)}" fill="{_color(color)}"/>')
+    parts.append(f'<circle r="{_num(circle_radius - style["inset"] - ring / 2.0)}" fill="none" '
+                 f'stroke="#000000" stroke-width="{ring}"/>')
+    parts.append('</g>')
+    return ''.join(parts)
+
+def _text_attrs(font_size):
+    """Return (font-family, ascent) for the font the raster backend uses at this size."""
+    font = get_font(font_size)
+    try:
+        family = font.getname()[0]
+        ascent = font.getmetrics()[0]
+    except AttributeError:
+        # Pillow's bitmap default font has no name or metrics
+        family = SVG_FONT_FALLBACK
+        ascent = font_size * 0.8
+    return family, ascent
+
+@timed('svg')
+def render_svg(layout):
+    """Serialize a layout to an SVG document string."""
+    width, height = layout['size']
+    scale_factor = layout['scale_factor']
+    defs = {}
+    body = []
+
+    for item in layout['items']:
+        kind = item['type']
+        if kind == 'polyline':
+            color = resolve_color(item['color'])
+            width_px = int(item['width'])
+            points = ' '.join(f'{x},{y}' for x, y in item['points'].tolist())
+            body.append(f'<polyline points="{points}" fill="none" stroke="{_color(color)}" '
+                        f'stroke-width="{width_px}" stroke-linejoin="round" stroke-linecap="round"/>')
+            if width_px > 2:
+                # Same lighter overlay as curves.draw_polyline
+                lighter_color = tuple(min(255, int(c + (255-c)*0.3)) for c in color)
+                body.append(f'<polyline points="{points}" fill="none" stroke="{_color(lighter_color)}" '
+                            f'stroke-width="{max(1, width_px - 1)}" stroke-linejoin="round" stroke-linecap="round"/>')
+        elif kind == 'marker':
+            color = tuple(resolve_color(item['color']))
+            marker_id = 'marker-%s-%02x%02x%02x' % ((item['kind'],) + color)
+            if marker_id not in defs:
+                defs[marker_id] = _marker_def(marker_id, color, item['kind'], scale_factor)
+            x, y = item['xy']
+            body.append(f'<use href="#{marker_id}" x="{_num(int(x))}" y="{_num(int(y))}"/>')
+        elif kind == 'rect':
+            x0, y0, x1, y1 = item['box']
+            attrs = f'fill="{_color(item["fill"])}"'
+            if item.get('outline') is not None:
+                # Inset the stroke so it covers the same pixels as Pillow's inner outline
+                stroke = item.get('width', 1)
+                x0, y0, x1, y1 = x0 + stroke / 2.0, y0 + stroke / 2.0, x1 - stroke / 2.0 + 1, y1 - stroke / 2.0 + 1
+                attrs += f' stroke="{_color(item["outline"])}" stroke-width="{stroke}"'
+            else:
+                x1, y1 = x1 + 1, y1 + 1
+            body.append(f'<rect x="{_num(x0)}" y="{_num(y0)}" width="{_num(x1 - x0)}" '
+                        f'height="{_num(y1 - y0)}" {attrs}/>')
+        elif kind == 'text':
+            family, ascent = _text_attrs(item['font_size'])
+            x, y = item['xy']
+            # Pillow anchors text at the ascender line; SVG places the baseline
+            body.append(f'<text x="{_num(x)}" y="{_num(y + ascent)}" font-family={quoteattr(family)} '
+                        f'font-size="{_num(item["font_size"])}" fill="{_color(item["fill"])}" '
+                        f'textLength="{_num(item["text_width"])}" lengthAdjust="spacingAndGlyphs">'
+                        f'{escape(item["text"])}</text>')
+        elif kind == 'line':
+            (x0, y0), (x1, y1) = item['points']
+            body.append(f'<line x1="{_num(x0)}" y1="{_num(y0)}" x2="{_num(x1)}" y2="{_num(y1)}" '
+                        f'stroke="{_color(item["color"])}" stroke-width="{item["width"]}"/>')
+        elif kind == 'ellipse':
+            x0, y0, x1, y1 = item['box']
+            body.append(f'<ellipse cx="{_num((x0 + x1) / 2.0)}" cy="{_num((y0 + y1) / 2.0)}" '
+                        f'rx="{_num((x1 - x0) / 2.0)}" ry="{_num((y1 - y0) / 2.0)}" fill="{_color(item["fill"])}"/>')
+
+    return ''.join([
+        '<?xml version="1.0" encoding="UTF-8"?>\n',
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
+        '<defs>', ''.join(defs.values()), '</defs>',
+        f'<rect width="{width}" height="{height}" fill="#ffffff"/>',
+        ''.join(body),
+        '</svg>\n',
+    ])
+
+def create_timeline_svg(events, quality='standard', scale=None, width=None, height=None, cluster=True):
+    """Generate a timeline as an SVG string; vector output needs no supersampling."""
+    if not events:
+        return None
+
+    output_size, canvas_size, scale_factor = output_geometry(quality, scale, width, height, supersample=1)
+    return render_svg(compute_layout(events, canvas_size, scale_factor, cluster))
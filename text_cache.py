@@ -0,0 +1,104 @@
+"""Text measurement and glyph-run caches for labels.
+
+Layout measures every title and date string and the raster backend draws
+them; the same strings (dates especially) recur across events and renders.
+TextMetricsCache memoizes measured sizes per (family, weight, size, text) and
+GlyphRunCache keeps each rendered string as an 8-bit coverage mask that is
+pasted in the label color instead of being re-rasterized. Both record how much
+time they spend, so /cache_stats shows the text share of rendering.
+"""
+
+import math
+import time
+import threading
+
+from PIL import Image, ImageDraw
+
+from fonts import get_font
+from lru import LRUCache
+from metrics import add_stage_time
+
+class _Timer:
+    """Thread-safe accumulator of seconds spent in text work."""
+
+    def __init__(self):
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.seconds += seconds
+
+class TextMetricsCache:
+    """LRU of measured (width, height) keyed by (family, weight, size, text)."""
+
+    def __init__(self, max_entries=50000):
+        self._sizes = LRUCache(max_entries=max_entries)
+        self._timer = _Timer()
+        self._draw = ImageDraw.Draw(Image.new('RGB', (1, 1)))  # textbbox does not depend on the image
+
+    def measure(self, text, size, family='sans', weight='regular'):
+        """Return (width, height) of text as drawn at size; raises like ImageDraw.textbbox on failure."""
+        start = time.perf_counter()
+        try:
+            key = (family, weight, int(size), text)
+            dimensions = self._sizes.get(key)
+            if dimensions is None:
+                bbox = self._draw.textbbox((0, 0), text, font=get_font(size, family, weight))
+                dimensions = (float(bbox[2] - bbox[0]), float(bbox[3] - bbox[1]))
+                self._sizes.put(key, dimensions)
+            return dimensions
+        finally:
+            elapsed = time.perf_counter() - start
+            self._timer.add(elapsed)
+            add_stage_time('text_measure', elapsed)
+
+    def clear(self):
+        self._sizes.clear()
+
+    def stats(self):
+        stats = self._sizes.stats()
+        stats['seconds'] = round(self._timer.seconds, 4)
+        return stats
+
+class GlyphRunCache:
+    """LRU of rendered strings as 'L' coverage masks, keyed by (family, weight, size, text).
+
+    Pasting a mask in the fill color blends exactly like ImageDraw.text, so a
+    cached run is pixel-identical to drawing the string again.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self._runs = LRUCache(max_bytes=max_bytes, sizeof=lambda run: run[1].width * run[1].height)
+        self._timer = _Timer()
+
+    def get(self, text, size, family='sans', weight='regular'):
+        """Return ((dx, dy), mask) for text, rendering the mask on first use."""
+        key = (family, weight, int(size), text)
+        return self._runs.get_or_create(key, lambda: self._render(text, get_font(size, family, weight)))
+
+    def draw(self, img, xy, text, fill, size, family='sans', weight='regular'):
+        """Paste text in fill with its top-left anchor at xy, as ImageDraw.text would draw it."""
+        start = time.perf_counter()
+        (dx, dy), mask = self.get(text, size, family, weight)
+        if mask.width and mask.height:
+            img.paste(fill, (math.floor(xy[0]) + dx, math.floor(xy[1]) + dy), mask)
+        self._timer.add(time.perf_counter() - start)
+
+    def clear(self):
+        self._runs.clear()
+
+    def stats(self):
+        stats = self._runs.stats()
+        stats['seconds'] = round(self._timer.seconds, 4)
+        return stats
+
+    @staticmethod
+    def _render(text, font):
+        x0, y0, x1, y1 = font.getbbox(text)
+        mask = Image.new('L', (max(0, x1 - x0), max(0, y1 - y0)), 0)
+        ImageDraw.Draw(mask).text((-x0, -y0), text, fill=255, font=font)
+        return (x0, y0), mask
+
+text_metrics = TextMetricsCache()
+glyph_runs = GlyphRunCache()
@@ -0,0 +1,83 @@
+"""Tiled rendering: lay a timeline out once per zoom level and paint fixed-width tiles on demand.
+
+At zoom z the logical canvas is 2**z times the requested width (the height is
+unchanged), so zooming in spreads events apart while text keeps its size. The
+layout for a zoom level is computed once and kept with each item's x extent, so
+a tile request only paints the items that overlap its slice of the canvas.
+Render workers keep their own tile sets by id (render_cached_tile), so each
+worker lays out a zoom level once however many of its tiles it paints.
+"""
+
+from encoders import encode_image
+from layout import compute_layout, layout_extents, output_geometry
+from lru import LRUCache
+from raster import render_columns
+
+TILE_SIZE = 512  # Output pixels per tile, horizontally
+MAX_TILE_ZOOM = 8
+MAX_TILE_CANVAS_WIDTH = 1 << 20  # Logical width limit at the deepest zoom
+
+# Tile sets laid out in this process, by tile set id
+_process_tile_sets = LRUCache(max_entries=8)
+
+class TileSet:
+    """One timeline (events plus render options) served as tiles at several zoom levels."""
+
+    def __init__(self, events, options, max_layouts=4):
+        self.events = events
+        self.options = options
+        self._layouts = LRUCache(max_entries=max_layouts)
+
+    @property
+    def max_zoom(self):
+        width = self.options['width'] * self.options['scale']
+        zoom = 0
+        while zoom < MAX_TILE_ZOOM and width * 2 ** (zoom + 1) <= MAX_TILE_CANVAS_WIDTH:
+            zoom += 1
+        return zoom
+
+    def output_size(self, zoom):
+        output_size, _, _ = self._geometry(zoom)
+        return output_size
+
+    def tile_count(self, zoom):
+        return -(-self.output_size(zoom)[0] // TILE_SIZE)
+
+    def info(self):
+        """Zoom levels with their output width and tile count."""
+        return [{'z': zoom, 'width': self.output_size(zoom)[0], 'tiles': self.tile_count(zoom)}
+                for zoom in range(self.max_zoom + 1)]
+
+    def layout(self, zoom):
+        """Return the zoom level's layout, with per-item x extents, computing it on first use."""
+        return self._layouts.get_or_create(zoom, lambda: self._build_layout(zoom))
+
+    def has_tile(self, zoom, x):
+        return 0 <= zoom <= self.max_zoom and 0 <= x < self.tile_count(zoom)
+
+    def render_tile(self, zoom, x):
+        """Paint tile x at zoom as an output-resolution RGB image."""
+        if not self.has_tile(zoom, x):
+            raise IndexError('Tile out of range')
+        output_size = self.output_size(zoom)
+        layout = self.layout(zoom)
+        left = x * TILE_SIZE
+        return render_columns(layout, left, min(left + TILE_SIZE, output_size[0]), output_size, self.options['quality'])
+
+    def render_tile_bytes(self, zoom, x, fmt='png', encode_options=None):
+        return encode_image(self.render_tile(zoom, x), fmt, **(encode_options or {}))
+
+    def _geometry(self, zoom):
+        options = self.options
+        return output_geometry(options['quality'], options['scale'], options['width'] * 2 ** zoom, options['height'])
+
+    def _build_layout(self, zoom):
+        _, canvas_size, scale_factor = self._geometry(zoom)
+        layout = compute_layout(self.events, canvas_size, scale_factor, self.options.get('cluster', True))
+        layout['extents'] = layout_extents(layout)
+        return layout
+
+def render_cached_tile(tile_set_id, events, options, zoom, x, fmt='png'):
+    """Encoded tile from this process's tile set for tile_set_id, creating it from events on first use."""
+    tile_set = _process_tile_sets.get_or_create(tile_set_id, lambda: TileSet(events, options))
+    return tile_set.render_tile_bytes(zoom, x, fmt)
@@ -0,0 +1,54 @@
+"""Warm-up that fills the process-wide render caches before the first request.
+
+warm_up() loads every font size, renders the marker sprites for the default
+event color, loads Pillow's encoder plugins, and renders a small timeline in
+each quality mode and raster format, which also seeds the text caches.
+Importing this module runs it. The app lists the module in the render pool's
+forkserver preload, so under the production settings (gunicorn.conf.py) the
+fork server warms up once and every render worker is forked from it with these
+caches already resident and shared copy-on-write.
+"""
+
+import time
+import logging
+
+from encoders import OUTPUT_FORMATS, encode_image
+from events import DEFAULT_EVENT_COLOR, EventTable
+from layout import QUALITY_MODES, hex_to_rgb, preload_fonts
+from raster import create_timeline_image
+from sprites import MARKER_STYLES, marker_sprites
+
+logger = logging.getLogger(__name__)
+
+WARMUP_EVENTS = [
+    {'date': '2024-01-15', 'event': 'Project kickoff'},
+    {'date': '2024-02-01', 'end_date': '2024-04-30', 'event': 'Design phase', 'color': '#007bff'},
+    {'date': '2024-05-20', 'event': 'Beta release', 'color': '#28a745'},
+    {'date': '2024-06-01', 'end_date': '2024-08-15', 'event': 'Pilot', 'color': '#ffc107'},
+    {'date': '2024-09-10', 'event': 'Launch'},
+]
+
+_warmed = False
+
+def warm_up():
+    """Fill fonts, sprites, encoders and text caches for this process (once)."""
+    global _warmed
+    if _warmed:
+        return
+    start = time.perf_counter()
+    preload_fonts()
+    scale_factors = {mode['supersample'] * mode['scale'] for mode in QUALITY_MODES.values()}
+    for scale_factor in scale_factors:
+        for kind in MARKER_STYLES:
+            marker_sprites.get(hex_to_rgb(DEFAULT_EVENT_COLOR), kind, scale_factor)
+
+    table = EventTable.from_events(WARMUP_EVENTS)
+    raster_formats = [fmt for fmt, spec in OUTPUT_FORMATS.items() if spec['pil_format']]
+    for quality in QUALITY_MODES:
+        img = create_timeline_image(table, quality=quality)
+        for fmt in raster_formats:
+            encode_image(img, fmt)
+    _warmed = True
+    logger.info(f"Render caches warmed in {time.perf_counter() - start:.2f}s")
+
+warm_up()